@@ -0,0 +1,211 @@
+import atexit
+import json
+import logging
+import os
+import signal
+import threading
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db import connections
+
+from jobs.queue import enqueue
+
+logger = logging.getLogger(__name__)
+
+# Именованные буферы, которые сбрасываются при остановке процесса.
+writers = {}
+
+
+class BufferedWriter(ABC):
+    """Копит записи в памяти и сбрасывает их одной пачкой.
+
+    Сброс происходит, когда накопилось max_items записей или прошло
+    flush_interval секунд с первой несброшенной записи. Записи с
+    одинаковым ключом схлопываются: остаётся последняя.
+
+    Запись пачки не держит блокировку буфера, поэтому медленная база
+    или прокси не задерживают тех, кто добавляет записи; пачки пишутся
+    по одной. После неудачного сброса таймер взводится снова. С
+    flush_in_background полный буфер тоже сбрасывает поток таймера, а
+    не тот, кто добавил запись.
+
+    Буфер с именем name сбрасывается при остановке процесса, в том
+    числе по SIGTERM; то, что не удалось записать, уходит в очередь
+    задач и дописывается воркером. SIGKILL перехватить нельзя: записи
+    за последний flush_interval при нём теряются.
+    """
+    flush_in_background = False
+
+    def __init__(self, name=None):
+        self.name = name
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._items = {}
+        self._writing = {}
+        self._timer = None
+        if name is not None:
+            writers[name] = self
+
+    @property
+    def flush_interval(self):
+        return settings.WRITE_BEHIND_FLUSH_MS / 1000
+
+    @property
+    def max_items(self):
+        return settings.WRITE_BEHIND_MAX_ITEMS
+
+    def add(self, key, item):
+        self._store(key, item, combine=False)
+
+    def accumulate(self, key, item):
+        """Как add, но объединяет item с несброшенной записью ключа
+        через merge."""
+        self._store(key, item, combine=True)
+
+    def _store(self, key, item, combine):
+        # Полный буфер сбрасывается уже без _lock: flush берёт
+        # _write_lock раньше _lock.
+        with self._lock:
+            if combine and key in self._items:
+                item = self.merge(self._items[key], item)
+            self._items[key] = item
+            full = len(self._items) >= self.max_items
+            if full and self.flush_in_background:
+                self._schedule(0)
+                full = False
+            elif not full and self._timer is None and self.flush_interval:
+                self._schedule(self.flush_interval)
+        if full:
+            self.flush()
+
+    def pending(self):
+        """Несброшенные записи, включая пачку, которая пишется сейчас."""
+        with self._lock:
+            return {**self._writing, **self._items}
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                items, self._items = self._items, {}
+                self._writing = items
+                self._cancel_timer()
+            if not items:
+                return
+            try:
+                self.write(items)
+            except Exception:
+                logger.exception('Не удалось сбросить буфер записи.')
+                with self._lock:
+                    for key, item in items.items():
+                        if key in self._items:
+                            item = self.merge(item, self._items[key])
+                        self._items[key] = item
+                    if self.flush_interval:
+                        self._schedule(self.flush_interval)
+                raise
+            finally:
+                with self._lock:
+                    self._writing = {}
+
+    def merge(self, unwritten, newer):
+        """Запись для ключа, который снова добавили, пока пачка с ним
+        писалась и не записалась, или который пополняет accumulate. По
+        умолчанию побеждает новая."""
+        return newer
+
+    def clear(self):
+        """Отбрасывает несброшенные записи."""
+        with self._lock:
+            self._items = {}
+
+    def spill(self):
+        """Передаёт несброшенные записи в очередь задач.
+
+        Если недоступна и очередь, записи остаются в логе целиком, чтобы
+        их можно было восстановить вручную.
+        """
+        with self._lock:
+            items, self._items = self._items, {}
+        if not items:
+            return
+        payload = self.dump(items)
+        try:
+            enqueue('core.replay_buffer', writer=self.name, items=payload)
+        except Exception:
+            logger.exception('Записи буфера %s потеряны: %s', self.name,
+                             json.dumps(payload, ensure_ascii=False))
+
+    def dump(self, items):
+        """Записи в виде, пригодном для JSON."""
+        return list(items.items())
+
+    def load(self, data):
+        return {tuple(key) if isinstance(key, list) else key: item
+                for key, item in data}
+
+    def _schedule(self, delay):
+        self._cancel_timer()
+        self._timer = threading.Timer(delay, self._flush_in_thread)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_in_thread(self):
+        try:
+            self.flush()
+        except Exception:
+            # Уже записано в лог, таймер взведён снова.
+            pass
+        finally:
+            connections.close_all()
+
+    @abstractmethod
+    def write(self, items):
+        """Записывает пачку {ключ: запись}.
+
+        При ошибке в буфер возвращается то, что осталось в items: уже
+        записанные ключи write может удалить из него до исключения.
+        """
+
+
+def drain():
+    """Сбрасывает именованные буферы; несброшенное уходит в очередь."""
+    for writer in list(writers.values()):
+        try:
+            writer.flush()
+        except Exception:
+            # Уже записано в лог.
+            pass
+        writer.spill()
+
+
+def handle_sigterm(previous):
+    def handler(signum, frame):
+        drain()
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+    return handler
+
+
+def install_signal_handlers():
+    """Сбрасывает буферы по SIGTERM, затем зовёт прежний обработчик.
+
+    По SIGTERM процесс завершается без atexit, поэтому его приходится
+    перехватывать отдельно. Обработчик ставится только из главного
+    потока.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+    signal.signal(signal.SIGTERM, handle_sigterm(previous))
+
+
+atexit.register(drain)
@@ -0,0 +1,11 @@
+from posts.notifications import unread_count
+
+
+def notifications(request):
+    """Добавляет число непрочитанных уведомлений пользователя."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {
+        'unread_notifications': unread_count(user),
+    }
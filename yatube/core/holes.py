@@ -0,0 +1,92 @@
+import re
+from functools import wraps
+from urllib.parse import quote, unquote
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .purge import HEADER, add_surrogate_keys, key_versions
+
+HOLE_RE = re.compile(r'<!--hole:(\w+)((?::[^:>]*)*)-->')
+
+fragments = {}
+
+
+def fragment(name):
+    """Регистрирует функцию (request, *args) -> HTML для дыры name."""
+    def register(func):
+        fragments[name] = func
+        return func
+    return register
+
+
+def placeholder(name, args):
+    encoded = ''.join(f':{quote(str(arg), safe="")}' for arg in args)
+    return f'<!--hole:{name}{encoded}-->'
+
+
+def render_fragment(request, name, args):
+    return fragments[name](request, *map(str, args))
+
+
+def splice(request, content):
+    """Заполняет дыры оболочки фрагментами для этого запроса.
+
+    Текст пользователей в оболочке экранирован, поэтому подделать
+    метку дыры он не может.
+    """
+    def fill(match):
+        args = [unquote(arg) for arg in match.group(2).split(':')[1:]]
+        return render_fragment(request, match.group(1), args)
+    return HOLE_RE.sub(fill, content)
+
+
+def shell_key(request):
+    return f'shell:{request.get_full_path()}'
+
+
+def render_shell(view, request, *args, **kwargs):
+    """Отрисовывает страницу как для анонима, с метками вместо дыр."""
+    user = request.user
+    request.user = AnonymousUser()
+    request.rendering_shell = True
+    try:
+        return view(request, *args, **kwargs)
+    finally:
+        request.user = user
+        request.rendering_shell = False
+
+
+def cache_shell(view):
+    """Кэширует общую для всех оболочку страницы.
+
+    Оболочка одна на адрес и хранится SHELL_CACHE_SECONDS; на каждый
+    запрос отрисовываются только фрагменты в её дырах, поэтому кэш
+    работает и для вошедших пользователей. Оболочка устаревает, когда
+    меняется версия любого из её ключей Surrogate-Key.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or not settings.SHELL_CACHE_SECONDS):
+            return view(request, *args, **kwargs)
+        key = shell_key(request)
+        shell = cache.get(key)
+        if shell is None or key_versions(shell['keys']) != shell['versions']:
+            response = render_shell(view, request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return view(request, *args, **kwargs)
+            keys = response.get(HEADER, '').split()
+            shell = {
+                'content': response.content.decode(response.charset),
+                'content_type': response['Content-Type'],
+                'keys': keys,
+                'versions': key_versions(keys),
+            }
+            cache.set(key, shell, settings.SHELL_CACHE_SECONDS)
+        response = HttpResponse(splice(request, shell['content']),
+                                content_type=shell['content_type'])
+        return add_surrogate_keys(request, response, shell['keys'])
+    return wrapper
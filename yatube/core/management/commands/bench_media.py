@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views.static import serve
+
+from core.media import serve_media
+
+NAME = 'posts/bench.bin'
+
+
+def consume(response):
+    """Читает тело так, как это делает WSGI-сервер без sendfile."""
+    size = 0
+    for chunk in response.streaming_content:
+        size += len(chunk)
+    response.close()
+    return size
+
+
+def send_file(response):
+    """Передаёт файл через os.sendfile, как gunicorn с file_wrapper."""
+    file = response.file_to_stream
+    size = os.fstat(file.fileno()).st_size
+    with open(os.devnull, 'wb') as devnull:
+        offset = 0
+        while offset < size:
+            offset += os.sendfile(
+                devnull.fileno(), file.fileno(), offset, size - offset)
+    response.close()
+    return size
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает скорость и процессорное время отдачи медиафайла: '
+            'django.views.static.serve, поток FileResponse, sendfile и '
+            'X-Accel-Redirect.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size-mb', type=int, default=50,
+            help='Размер файла в мегабайтах.')
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз отдать файл в каждом режиме.')
+
+    def measure(self, label, get_response, transfer, repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        sent = sum(transfer(get_response()) for _ in range(repeat))
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        megabytes = sent / 2 ** 20
+        speed = (f'{megabytes / wall:.0f} МБ/с' if sent
+                 else f'{repeat / wall:.0f} запросов/с')
+        self.stdout.write(
+            f'{label}: {speed}, '
+            f'процессор {cpu / repeat * 1000:.2f} мс на запрос')
+
+    def handle(self, *args, **options):
+        root = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(root, 'posts'))
+            with open(os.path.join(root, NAME), 'wb') as file:
+                for _ in range(options['size_mb']):
+                    file.write(os.urandom(2 ** 20))
+            request = RequestFactory().get(f'/media/{NAME}')
+            request.user = AnonymousUser()
+            repeat = options['repeat']
+            with override_settings(MEDIA_ROOT=root, MEDIA_ACCEL=''):
+                self.measure(
+                    'static.serve', lambda: serve(request, NAME, root),
+                    consume, repeat)
+                self.measure(
+                    'FileResponse, поток', lambda: serve_media(request, NAME),
+                    consume, repeat)
+                self.measure(
+                    'FileResponse, sendfile',
+                    lambda: serve_media(request, NAME), send_file, repeat)
+            with override_settings(MEDIA_ROOT=root,
+                                   MEDIA_ACCEL='x-accel-redirect'):
+                self.measure(
+                    'X-Accel-Redirect (байты отдаёт nginx)',
+                    lambda: serve_media(request, NAME),
+                    lambda response: len(response.content), repeat)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
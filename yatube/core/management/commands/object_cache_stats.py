@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.objectcache import registry
+
+
+class Command(BaseCommand):
+    help = ('Показывает попадания и промахи кэшей объектов. Счётчики '
+            'лежат в кэше, так что с общим кэшем видны все процессы.')
+
+    def handle(self, *args, **options):
+        for name, object_cache in sorted(registry.items()):
+            stats = object_cache.stats()
+            lookups = sum(stats.values()) or 1
+            hit_rate = (stats['hit'] + stats['missing']) / lookups
+            self.stdout.write(
+                f'{name}: попаданий {stats["hit"]}, промахов {stats["miss"]}, '
+                f'закэшированных 404 {stats["missing"]}, '
+                f'доля попаданий {hit_rate:.0%}')
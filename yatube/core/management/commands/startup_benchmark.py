@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Замер идёт в отдельном процессе, чтобы импорты не были уже прогреты.
+PROBE = '''
+import json
+import sys
+import time
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+
+application = get_wsgi_application()
+imported = time.perf_counter()
+
+environ = {'PATH_INFO': sys.argv[1], 'HTTP_HOST': 'localhost',
+           'wsgi.input': BytesIO()}
+setup_testing_defaults(environ)
+status = []
+body = b''.join(application(
+    environ, lambda code, headers, *args: status.append(code)))
+served = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'first_request': served - imported,
+    'status': status[0],
+    'modules': len(sys.modules),
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время импорта и первого запроса '
+            'для разных профилей настроек.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles', nargs='+',
+            default=['yatube.settings', 'yatube.settings_production'],
+            help='Модули настроек для сравнения.')
+        parser.add_argument('--url', default='/', help='Адрес запроса.')
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Сколько раз запускать каждый профиль.')
+
+    def probe(self, profile, url):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile}
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE, url], cwd=settings.BASE_DIR,
+            env=env, capture_output=True, text=True, check=True)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        for profile in options['profiles']:
+            runs = [self.probe(profile, options['url'])
+                    for __ in range(options['repeat'])]
+            best = min(runs, key=lambda run: run['import'])
+            self.stdout.write(
+                f'{profile}: импорт {best["import"] * 1000:.0f} мс, '
+                f'первый запрос '
+                f'{min(run["first_request"] for run in runs) * 1000:.0f} мс, '
+                f'модулей {best["modules"]}, статус {best["status"]}')
@@ -0,0 +1,48 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def copy_database(source, target):
+    """Копирует SQLite-базу целиком через backup API.
+
+    Копия пишется под блокировкой приёмника, поэтому читатели реплики
+    видят либо старый, либо новый снимок, но не промежуточное состояние.
+    """
+    source_conn = sqlite3.connect(source)
+    target_conn = sqlite3.connect(target)
+    try:
+        source_conn.backup(target_conn)
+    finally:
+        target_conn.close()
+        source_conn.close()
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную SQLite-базу в реплики из DB_REPLICAS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять синхронизацию каждые N секунд.')
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('Реплики не настроены, задайте DB_REPLICAS.')
+        primary = settings.DATABASES['default']
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError(
+                'Синхронизация поддерживается только для SQLite, '
+                'для остальных СУБД используйте встроенную репликацию.')
+        while True:
+            for alias in settings.REPLICA_DATABASES:
+                started = time.monotonic()
+                copy_database(primary['NAME'],
+                              settings.DATABASES[alias]['NAME'])
+                self.stdout.write(
+                    f'{alias}: {time.monotonic() - started:.3f} с')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,154 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class MediaFileResponse(FileResponse):
+    """Поток файла крупными блоками: меньше итераций в Python, если
+    сервер не умеет sendfile."""
+    block_size = 64 * 1024
+
+
+class FileRange:
+    """Часть открытого файла длиной length начиная со start."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def can_access(request, path):
+    """Картинки постов и их миниатюры видны всем, остальное - только
+    сотрудникам."""
+    return (path.startswith(settings.MEDIA_PUBLIC_PREFIXES)
+            or request.user.is_staff)
+
+
+def resolve(path):
+    """Абсолютный путь к файлу внутри MEDIA_ROOT или Http404."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Файл не найден.')
+    if not os.path.isfile(full_path):
+        raise Http404('Файл не найден.')
+    return full_path
+
+
+def parse_range(header, size):
+    """Границы (start, end) одного диапазона из Range включительно.
+
+    None - заголовок не разобран или диапазонов несколько: тогда
+    отдаётся весь файл.
+    """
+    match = RANGE_RE.match(header)
+    if match is None or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    else:
+        start, end = max(size - int(end), 0), size - 1
+    if start > end or start >= size:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def accel_response(path, full_path, content_type):
+    """Пустой ответ, передачу файла делает веб-сервер перед приложением."""
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_PREFIX + quote(path))
+    else:
+        response['X-Sendfile'] = full_path
+    return response
+
+
+def file_response(request, full_path, content_type, size, validators):
+    """Поток файла; WSGI-сервер с wsgi.file_wrapper отдаёт целый файл
+    через sendfile без копирования в Python."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    header = request.META.get('HTTP_RANGE')
+    if not header or (if_range and if_range not in validators):
+        return MediaFileResponse(open(full_path, 'rb'),
+                                 content_type=content_type)
+    try:
+        byte_range = parse_range(header, size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        return MediaFileResponse(open(full_path, 'rb'),
+                                 content_type=content_type)
+    start, end = byte_range
+    response = MediaFileResponse(
+        FileRange(open(full_path, 'rb'), start, end - start + 1),
+        status=206, content_type=content_type)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = end - start + 1
+    return response
+
+
+def serve_media(request, path):
+    """Отдаёт файл из MEDIA_ROOT после проверки доступа.
+
+    С MEDIA_ACCEL передачу выполняет nginx (X-Accel-Redirect) или
+    Apache/lighttpd (X-Sendfile); без него файл отдаёт приложение, с
+    поддержкой Range и условных запросов.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    if not can_access(request, path):
+        raise Http404('Файл не найден.')
+    full_path = resolve(path)
+    stat = os.stat(full_path)
+    etag = quote_etag(f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type = (mimetypes.guess_type(full_path)[0]
+                        or 'application/octet-stream')
+        if settings.MEDIA_ACCEL:
+            response = accel_response(path, full_path, content_type)
+        else:
+            response = file_response(
+                request, full_path, content_type, stat.st_size,
+                (etag, http_date(last_modified)))
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    if path.startswith(settings.MEDIA_PUBLIC_PREFIXES):
+        patch_cache_control(response, public=True,
+                            max_age=settings.MEDIA_MAX_AGE)
+    else:
+        patch_cache_control(response, private=True)
+    return response
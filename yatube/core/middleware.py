@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.middleware import gzip
+
+
+class ReplicaPinMiddleware:
+    """После записи закрепляет пользователя за основной базой.
+
+    Пока кука жива, use_replica не уводит чтения на реплики, и автор
+    сразу видит свои изменения, даже если реплики ещё не синхронизированы.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (settings.REPLICA_DATABASES
+                and request.method not in ('GET', 'HEAD', 'OPTIONS')
+                and response.status_code < 500):
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True)
+        return response
+
+
+class GZipMiddleware(gzip.GZipMiddleware):
+    """Сжимает ответы, кроме потоков событий и файлов.
+
+    gzip копит данные в буфере и задерживал бы события SSE, а у файлов
+    с Accept-Ranges сжатие сломало бы докачку и sendfile.
+    """
+
+    def process_response(self, request, response):
+        if (response.get('Content-Type', '').startswith('text/event-stream')
+                or response.has_header('Accept-Ranges')):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.http import Http404
+
+MISSING = 'missing'
+
+registry = {}
+
+
+class ObjectCache:
+    """Read-through кэш объектов модели по уникальному полю.
+
+    Промах читает строку из базы и кладёт её в кэш на
+    OBJECT_CACHE_SECONDS. Отсутствие объекта тоже кэшируется, на
+    OBJECT_CACHE_MISSING_SECONDS, чтобы перебор случайных имён не
+    доходил до базы. Счётчики попаданий и промахов лежат в том же кэше.
+    """
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.name = f'{model._meta.label_lower}.{field}'
+        registry[self.name] = self
+
+    def key(self, value):
+        return f'objectcache:{self.name}:{value}'
+
+    def pk_key(self, pk):
+        return f'objectcache:{self.name}:pk:{pk}'
+
+    def count(self, event):
+        key = f'objectcache:stats:{self.name}:{event}'
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+    def stats(self):
+        events = ('hit', 'miss', 'missing')
+        values = cache.get_many(
+            [f'objectcache:stats:{self.name}:{event}' for event in events])
+        return {event: values.get(
+            f'objectcache:stats:{self.name}:{event}', 0) for event in events}
+
+    def get(self, value):
+        """Объект с полем, равным value, или None."""
+        obj = cache.get(self.key(value))
+        if obj == MISSING:
+            self.count('missing')
+            return None
+        if obj is not None:
+            self.count('hit')
+            return obj
+        self.count('miss')
+        # Кэш живёт долго, поэтому читаем основную базу: с отстающей
+        # реплики только что созданный объект закэшировался бы как
+        # отсутствующий.
+        obj = self.model.objects.using(
+            router.db_for_write(self.model)).filter(
+            **{self.field: value}).first()
+        if obj is None:
+            cache.set(self.key(value), MISSING,
+                      settings.OBJECT_CACHE_MISSING_SECONDS)
+            return None
+        cache.set_many({self.key(value): obj, self.pk_key(obj.pk): value},
+                       settings.OBJECT_CACHE_SECONDS)
+        return obj
+
+    def get_or_404(self, value):
+        obj = self.get(value)
+        if obj is None:
+            raise Http404(f'Нет объекта {self.name}={value}.')
+        return obj
+
+    def invalidate(self, instance):
+        """Сбрасывает объект по текущему и прежнему значению поля."""
+        previous = cache.get(self.pk_key(instance.pk))
+        cache.delete_many([self.key(getattr(instance, self.field)),
+                           self.key(previous), self.pk_key(instance.pk)])
@@ -0,0 +1,97 @@
+import logging
+import uuid
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from .buffers import BufferedWriter
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Surrogate-Key'
+
+
+def add_surrogate_keys(request, response, keys):
+    """Помечает ответ ключами для кэширующего прокси.
+
+    Ответы анонимам прокси может держать SURROGATE_MAX_AGE секунд:
+    устаревшие страницы он выбросит по ключам через purge.
+    """
+    existing = response.get(HEADER, '').split()
+    response[HEADER] = ' '.join(dict.fromkeys([*existing, *keys]))
+    if (request.method in ('GET', 'HEAD')
+            and not request.user.is_authenticated):
+        response['Surrogate-Control'] = (
+            f'max-age={settings.SURROGATE_MAX_AGE}')
+    return response
+
+
+def version_key(key):
+    return f'surrogate:{key}'
+
+
+def key_versions(keys):
+    """Текущие версии ключей; страница, собранная при других версиях,
+    устарела."""
+    versions = cache.get_many([version_key(key) for key in keys])
+    return [versions.get(version_key(key), 0) for key in keys]
+
+
+def expire(keys):
+    """Меняет версии ключей, чтобы сбросить локальные кэши страниц."""
+    version = uuid.uuid4().hex
+    cache.set_many({version_key(key): version for key in keys}, None)
+
+
+class PurgeDispatcher(BufferedWriter):
+    """Копит ключи для сброса и отправляет их на PURGE_URL пачками.
+
+    Пачка уходит раз в PURGE_FLUSH_MS или по PURGE_BATCH_SIZE ключам
+    одним POST {"surrogate_keys": [...]}. Без PURGE_URL ключи не
+    копятся. Если прокси недоступен, ключи остаются в буфере до
+    следующего сброса. Локальные кэши страниц сбрасываются сразу.
+    Запросы к прокси уходят только из потока таймера: purge вызывается
+    из запроса и не ждёт прокси.
+    """
+    flush_in_background = True
+
+    @property
+    def flush_interval(self):
+        return settings.PURGE_FLUSH_MS / 1000
+
+    @property
+    def max_items(self):
+        return settings.PURGE_BATCH_SIZE
+
+    def purge(self, keys):
+        expire(keys)
+        if not settings.PURGE_URL:
+            return
+        for key in keys:
+            self.add(key, key)
+
+    def flush(self):
+        try:
+            super().flush()
+        except requests.RequestException:
+            # Уже записано в лог.
+            pass
+
+    def write(self, items):
+        keys = sorted(items)
+        batch_size = settings.PURGE_BATCH_SIZE
+        for start in range(0, len(keys), batch_size):
+            self.send(keys[start:start + batch_size])
+
+    def send(self, keys):
+        headers = {}
+        if settings.PURGE_TOKEN:
+            headers['Authorization'] = f'Bearer {settings.PURGE_TOKEN}'
+        response = requests.post(
+            settings.PURGE_URL, json={'surrogate_keys': keys},
+            headers=headers, timeout=settings.PURGE_TIMEOUT)
+        response.raise_for_status()
+
+
+dispatcher = PurgeDispatcher('core.purge.dispatcher')
@@ -0,0 +1,58 @@
+import random
+import threading
+from functools import wraps
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def current_replica():
+    """Реплика, выбранная для текущего запроса, или None."""
+    return getattr(_state, 'replica', None)
+
+
+def is_pinned(request):
+    """Пользователь недавно писал и должен читать с основной базы."""
+    return settings.REPLICA_PIN_COOKIE in request.COOKIES
+
+
+def use_replica(view_func):
+    """Направляет чтения представления на одну из реплик.
+
+    Небезопасные запросы и запросы пользователей, которые недавно
+    что-то записали, остаются на основной базе.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        replicas = settings.REPLICA_DATABASES
+        if (not replicas or request.method not in ('GET', 'HEAD')
+                or is_pinned(request)):
+            return view_func(request, *args, **kwargs)
+        _state.replica = random.choice(replicas)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _state.replica = None
+    return wrapper
+
+
+class ReplicaRouter:
+    """Чтения внутри use_replica идут на реплику, записи - на default."""
+
+    def db_for_read(self, model, **hints):
+        return current_replica()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.REPLICA_DATABASES}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
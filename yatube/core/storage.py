@@ -0,0 +1,34 @@
+import gzip
+
+from django.contrib.staticfiles.storage import StaticFilesStorage
+from django.core.files.base import ContentFile
+
+
+class GzipStaticFilesStorage(StaticFilesStorage):
+    """Хранилище статики, которое после collectstatic сжимает текстовые
+    файлы в соседние .gz с максимальной степенью сжатия."""
+
+    extensions = ('.css', '.js', '.svg', '.txt', '.html', '.json', '.map')
+    min_size = 200
+
+    def compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < self.min_size:
+            return None
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) >= len(content):
+            return None
+        gzip_name = f'{name}.gz'
+        if self.exists(gzip_name):
+            self.delete(gzip_name)
+        return self.save(gzip_name, ContentFile(compressed))
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        for name in paths:
+            if name.endswith(self.extensions):
+                gzip_name = self.compress(name)
+                if gzip_name:
+                    yield name, gzip_name, True
@@ -0,0 +1,11 @@
+from django.utils.module_loading import import_string
+
+from jobs.queue import task
+
+
+@task('core.replay_buffer')
+def replay_buffer(writer, items):
+    """Дописывает записи буфера, которые не удалось сбросить при
+    остановке процесса; writer - путь к буферу для import_string."""
+    buffer = import_string(writer)
+    buffer.write(buffer.load(items))
@@ -0,0 +1,19 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core import holes
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, *args):
+    """Фрагмент, свой для каждого пользователя.
+
+    В кэшируемой оболочке страницы вместо него остаётся метка, которую
+    cache_shell заполняет на каждом запросе.
+    """
+    request = context['request']
+    if getattr(request, 'rendering_shell', False):
+        return mark_safe(holes.placeholder(name, args))
+    return mark_safe(holes.render_fragment(request, name, args))
@@ -0,0 +1,50 @@
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from ..buffers import BufferedWriter
+
+
+class SlowCounter(BufferedWriter):
+    """Счётчик, запись которого занимает delay секунд."""
+    delay = 0.5
+
+    def __init__(self):
+        super().__init__()
+        self.written = {}
+
+    def merge(self, unwritten, newer):
+        return unwritten + newer
+
+    def write(self, items):
+        time.sleep(self.delay)
+        for key, count in items.items():
+            self.written[key] = self.written.get(key, 0) + count
+
+
+@override_settings(WRITE_BEHIND_FLUSH_MS=60000, WRITE_BEHIND_MAX_ITEMS=2)
+class BufferedWriterTests(SimpleTestCase):
+    def setUp(self):
+        self.counter = SlowCounter()
+        self.addCleanup(self.counter._cancel_timer)
+
+    def test_overflow_during_slow_flush(self):
+        """Переполнение во время медленного сброса ждёт его, а не
+        блокирует навсегда."""
+        self.counter.accumulate('first', 1)
+        flusher = threading.Thread(target=self.counter.flush, daemon=True)
+        flusher.start()
+        time.sleep(0.1)
+
+        def bump():
+            for key in ('first', 'second', 'first'):
+                self.counter.accumulate(key, 1)
+        bumper = threading.Thread(target=bump, daemon=True)
+        bumper.start()
+        flusher.join(3)
+        bumper.join(3)
+        self.assertFalse(flusher.is_alive())
+        self.assertFalse(bumper.is_alive())
+        self.counter.flush()
+        self.assertEqual(self.counter.written, {'first': 3, 'second': 1})
@@ -0,0 +1,50 @@
+import gzip
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+class GzipMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(author=author, text=f'Пост номер {number}')
+            for number in range(10))
+        self.client = Client()
+
+    def test_pages_are_compressed(self):
+        """Страница из оболочки сжимается для клиентов с gzip."""
+        url = reverse('posts:index')
+        plain = self.client.get(url)
+        self.assertNotIn('Content-Encoding', plain)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_event_stream_is_not_compressed(self):
+        response = self.client.get(reverse('posts:live_index'),
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+        response.close()
+
+
+class GzipStaticFilesStorageTests(TestCase):
+    def test_collectstatic_precompresses_text_assets(self):
+        """Рядом со стилями появляется .gz, картинки не сжимаются."""
+        with tempfile.TemporaryDirectory() as root:
+            with override_settings(STATIC_ROOT=root):
+                call_command('collectstatic', interactive=False, verbosity=0)
+            css = os.path.join(root, 'css', 'bootstrap.min.css')
+            with open(css, 'rb') as original, \
+                    gzip.open(f'{css}.gz') as compressed:
+                self.assertEqual(compressed.read(), original.read())
+            self.assertFalse(
+                os.path.exists(os.path.join(root, 'img', 'logo.png.gz')))
@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class ShellCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='-')
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Текст поста')
+        self.url = reverse('posts:post_detail', args=(self.post.pk,))
+
+    def client_for(self, user=None):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    def test_shell_is_shared_and_fragments_are_personal(self):
+        """Оболочку рисует первый запрос, остальные - только фрагменты."""
+        self.client_for().get(self.url)
+        with self.assertNumQueries(0):
+            shell = cache.get(f'shell:{self.url}')
+        self.assertNotIn('reader', shell['content'])
+        self.assertIn('<!--hole:comment_form:', shell['content'])
+        author_page = self.client_for(self.author).get(self.url)
+        reader_page = self.client_for(self.reader).get(self.url)
+        anonymous_page = self.client_for().get(self.url)
+        for response in (author_page, reader_page, anonymous_page):
+            # Представление не вызывалось: отрисованы только фрагменты.
+            self.assertNotIn('comments', response.context)
+            self.assertContains(response, 'Текст поста')
+            self.assertNotContains(response, '<!--hole:')
+        self.assertContains(author_page, 'редактировать запись')
+        self.assertNotContains(reader_page, 'редактировать запись')
+        self.assertContains(reader_page, 'Пользователь: reader')
+        self.assertContains(reader_page, 'csrfmiddlewaretoken')
+        self.assertContains(anonymous_page, 'Войти')
+        self.assertNotContains(anonymous_page, 'Добавить комментарий')
+
+    def test_change_expires_shell(self):
+        """Правка поста сбрасывает оболочку по его ключу."""
+        client = self.client_for(self.reader)
+        client.get(self.url)
+        self.post.text = 'Новый текст'
+        self.post.save()
+        response = client.get(self.url)
+        self.assertIn('comments', response.context)
+        self.assertContains(response, 'Новый текст')
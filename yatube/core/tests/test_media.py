@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+CONTENT = bytes(range(256)) * 40
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_ACCEL='')
+class MediaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in ('posts/image.jpg', 'private/report.txt'):
+            os.makedirs(os.path.join(MEDIA_ROOT, os.path.dirname(name)),
+                        exist_ok=True)
+            with open(os.path.join(MEDIA_ROOT, name), 'wb') as file:
+                file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse('media', args=('posts/image.jpg',))
+
+    def test_full_file(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_ranges(self):
+        """Обычный и суффиксный диапазоны, If-Range и 416."""
+        cases = {
+            'bytes=10-19': (206, CONTENT[10:20], 'bytes 10-19/10240'),
+            'bytes=-5': (206, CONTENT[-5:], 'bytes 10235-10239/10240'),
+            'bytes=10200-': (206, CONTENT[10200:], 'bytes 10200-10239/10240'),
+            'bytes=0-1,5-6': (200, CONTENT, None),
+        }
+        for header, (status, body, content_range) in cases.items():
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(b''.join(response.streaming_content), body)
+                self.assertEqual(response.get('Content-Range'), content_range)
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-0',
+                                   HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-0',
+                                   HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=99999-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10240')
+
+    def test_conditional(self):
+        first = self.client.get(self.url)
+        for headers in ({'HTTP_IF_NONE_MATCH': first['ETag']},
+                        {'HTTP_IF_MODIFIED_SINCE': first['Last-Modified']}):
+            with self.subTest(headers=headers):
+                response = self.client.get(self.url, **headers)
+                self.assertEqual(response.status_code, 304)
+
+    def test_access(self):
+        """Чужие каталоги видны только сотрудникам, выход из MEDIA_ROOT
+        невозможен."""
+        private = reverse('media', args=('private/report.txt',))
+        self.assertEqual(self.client.get(private).status_code, 404)
+        for path in ('posts/../private/report.txt', 'posts/../../x',
+                     'posts/missing.jpg'):
+            with self.subTest(path=path):
+                response = self.client.get(f'/media/{path}')
+                self.assertEqual(response.status_code, 404)
+        self.client.force_login(
+            User.objects.create_user(username='staff', is_staff=True))
+        response = self.client.get(private)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_accel_modes(self):
+        """С прокси ответ пустой, файл передаёт веб-сервер."""
+        with override_settings(MEDIA_ACCEL='x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'],
+                         '/protected-media/posts/image.jpg')
+        self.assertEqual(response.content, b'')
+        with override_settings(MEDIA_ACCEL='x-sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'],
+                         os.path.join(MEDIA_ROOT, 'posts', 'image.jpg'))
@@ -0,0 +1,90 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase, override_settings
+
+from ..purge import PurgeDispatcher
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        time.sleep(self.server.delay)
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.calls.append(
+            (self.headers.get('Authorization'), json.loads(body)))
+        self.send_response(self.server.status)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class PurgeDispatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.server.calls = []
+        self.server.status = 200
+        self.server.delay = 0
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        host, port = self.server.server_address
+        self.settings = override_settings(
+            PURGE_URL=f'http://{host}:{port}/purge', PURGE_TOKEN='secret',
+            PURGE_BATCH_SIZE=2, PURGE_FLUSH_MS=0)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        self.dispatcher = PurgeDispatcher()
+        self.addCleanup(self.dispatcher.clear)
+
+    def wait_for_calls(self, count):
+        deadline = time.monotonic() + 5
+        while len(self.server.calls) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_batches(self):
+        """Ключи уходят пачками из потока таймера, повторы схлопываются."""
+        self.server.delay = 0.2
+        start = time.monotonic()
+        self.dispatcher.purge(['post-1', 'post-1', 'index'])
+        self.assertLess(time.monotonic() - start, self.server.delay)
+        self.wait_for_calls(1)
+        self.dispatcher.purge(['group-1'])
+        self.assertEqual(self.server.calls, [
+            ('Bearer secret', {'surrogate_keys': ['index', 'post-1']})])
+        self.dispatcher.flush()
+        self.assertEqual(self.server.calls[1],
+                         ('Bearer secret', {'surrogate_keys': ['group-1']}))
+        self.assertEqual(self.dispatcher.pending(), {})
+
+    def test_failed_purge_is_retried(self):
+        """Ошибка прокси не теряет ключи и не роняет запрос."""
+        self.server.status = 503
+        self.dispatcher.purge(['post-1'])
+        self.dispatcher.flush()
+        self.assertEqual(list(self.dispatcher.pending()), ['post-1'])
+        self.server.status = 200
+        self.dispatcher.flush()
+        self.assertEqual(self.dispatcher.pending(), {})
+        self.assertEqual(len(self.server.calls), 2)
+
+    @override_settings(PURGE_FLUSH_MS=50)
+    def test_failed_purge_rearms_timer(self):
+        """После ошибки прокси ключи уходят снова без новых purge."""
+        self.server.status = 503
+        self.dispatcher.purge(['post-1'])
+        self.wait_for_calls(1)
+        self.server.status = 200
+        deadline = time.monotonic() + 5
+        while self.dispatcher.pending() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.dispatcher.pending(), {})
+        self.assertGreaterEqual(len(self.server.calls), 2)
+
+    def test_disabled_without_url(self):
+        with override_settings(PURGE_URL=''):
+            self.dispatcher.purge(['post-1'])
+        self.assertEqual(self.dispatcher.pending(), {})
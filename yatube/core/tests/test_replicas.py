@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.db import router
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..management.commands.sync_replicas import copy_database
+from ..routers import use_replica
+
+
+@use_replica
+def read_alias_view(request):
+    return HttpResponse(router.db_for_read(Post))
+
+
+@override_settings(REPLICA_DATABASES=['replica1'])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_read_only_view_reads_from_replica(self):
+        """GET-запрос представления с use_replica читает с реплики."""
+        response = read_alias_view(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica1')
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_writes_and_pinned_requests_stay_on_primary(self):
+        """POST и запросы с кукой закрепления идут на основную базу."""
+        self.assertEqual(
+            read_alias_view(self.factory.post('/')).content, b'default')
+        request = self.factory.get('/')
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = '1'
+        self.assertEqual(read_alias_view(request).content, b'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_write_pins_user_to_primary(self):
+        """После записи пользователь получает куку закрепления."""
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(author=user, text='Тестовый пост')
+        client = Client()
+        client.force_login(user)
+        response = client.post(
+            reverse('posts:add_comment', args=(post.id,)),
+            {'text': 'Комментарий'})
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+
+
+class CopyDatabaseTests(TestCase):
+    def test_copy_database(self):
+        """Синхронизация переносит содержимое основной базы в реплику."""
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'db.sqlite3')
+            target = os.path.join(directory, 'db_replica1.sqlite3')
+            with sqlite3.connect(source) as conn:
+                conn.execute('CREATE TABLE post (text TEXT)')
+                conn.execute("INSERT INTO post VALUES ('пост')")
+            copy_database(source, target)
+            conn = sqlite3.connect(target)
+            rows = conn.execute('SELECT text FROM post').fetchall()
+            conn.close()
+        self.assertEqual(rows, [('пост',)])
@@ -0,0 +1,52 @@
+import importlib
+import os
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+
+class ProductionSettingsTests(SimpleTestCase):
+    def load(self, **env):
+        with mock.patch.dict(os.environ, SECRET_KEY='secret', **env):
+            base = importlib.reload(importlib.import_module('yatube.settings'))
+            self.addCleanup(importlib.reload, base)
+            module = importlib.import_module('yatube.settings_production')
+            return importlib.reload(module)
+
+    def test_production_profile_strips_dev_tools(self):
+        """В боевом профиле нет debug_toolbar, а шаблоны кэшируются."""
+        production = self.load()
+        self.assertFalse(production.DEBUG)
+        self.assertNotIn('debug_toolbar', production.INSTALLED_APPS)
+        self.assertFalse(any('debug_toolbar' in item
+                             for item in production.MIDDLEWARE))
+        loader, __ = production.TEMPLATES[0]['OPTIONS']['loaders'][0]
+        self.assertEqual(loader, 'django.template.loaders.cached.Loader')
+        self.assertIn('django.contrib.admin', production.INSTALLED_APPS)
+
+    def test_feed_worker_skips_admin(self):
+        """Воркер лент не загружает админку и сообщения."""
+        production = self.load(FEED_WORKER='1')
+        self.assertNotIn('django.contrib.admin', production.INSTALLED_APPS)
+        self.assertNotIn('django.contrib.messages',
+                         production.INSTALLED_APPS)
+
+    def test_local_cache_keeps_sessions_in_database(self):
+        """Без общего кэша сессии и пользователи не кэшируются, а граф
+        подписок живёт в кэше недолго."""
+        with self.assertWarns(UserWarning):
+            production = self.load()
+        self.assertEqual(production.SESSION_ENGINE,
+                         'django.contrib.sessions.backends.db')
+        self.assertEqual(production.USER_CACHE_SECONDS, 0)
+        self.assertEqual(production.FOLLOW_GRAPH_SECONDS, 30)
+
+    def test_shared_cache_keeps_cached_sessions(self):
+        production = self.load(
+            CACHE_BACKEND='django.core.cache.backends.memcached.'
+                          'MemcachedCache',
+            CACHE_LOCATION='127.0.0.1:11211')
+        self.assertEqual(production.SESSION_ENGINE,
+                         'django.contrib.sessions.backends.cached_db')
+        self.assertEqual(production.USER_CACHE_SECONDS, 60)
+        self.assertEqual(production.FOLLOW_GRAPH_SECONDS, 3600)
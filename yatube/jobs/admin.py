@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'priority', 'attempts',
+                    'run_at', 'updated')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'dedup_key', 'last_error')
+    readonly_fields = ('attempts', 'last_error', 'created', 'updated')
+    empty_value_display = '-пусто-'
+    actions = ('retry',)
+
+    def retry(self, request, queryset):
+        queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, run_at=timezone.now(), attempts=0)
+    retry.short_description = 'Перезапустить выбранные задачи'
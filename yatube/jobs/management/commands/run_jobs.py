@@ -0,0 +1,51 @@
+import time
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                wait)
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import claim, requeue_stale, run_job
+
+
+def run_in_worker(pk):
+    try:
+        return run_job(pk)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в пуле потоков или процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4, help='Размер пула.')
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Пул процессов вместо пула потоков.')
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.')
+
+    def handle(self, *args, **options):
+        requeue_stale()
+        # Процессы-потомки не должны наследовать открытые соединения.
+        connections.close_all()
+        pool_class = (ProcessPoolExecutor if options['processes']
+                      else ThreadPoolExecutor)
+        with pool_class(max_workers=options['workers']) as pool:
+            while True:
+                pks = claim(options['workers'])
+                if pks:
+                    futures = [pool.submit(run_in_worker, pk) for pk in pks]
+                    wait(futures)
+                    for pk, future in zip(pks, futures):
+                        self.stdout.write(f'#{pk}: {future.result()}')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll'])
@@ -0,0 +1,44 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы (JSON)', default='{}')
+    priority = models.SmallIntegerField(
+        'Приоритет', default=0,
+        help_text='Задачи с большим приоритетом выполняются раньше')
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=QUEUED)
+    dedup_key = models.CharField(
+        'Ключ дедупликации', max_length=200, blank=True, null=True,
+        unique=True,
+        help_text='Пока задача с этим ключом не завершена, '
+                  'такая же задача повторно не ставится')
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток', default=5)
+    run_at = models.DateTimeField('Запустить не раньше', default=timezone.now)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    updated = models.DateTimeField('Обновлена', auto_now=True)
+
+    class Meta:
+        ordering = ['-priority', 'run_at']
+        indexes = [models.Index(fields=['status', '-priority', 'run_at'])]
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,103 @@
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(name):
+    """Регистрирует функцию как фоновую задачу с именем name."""
+    def decorator(func):
+        registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, priority=0, dedup_key=None, delay=0, **kwargs):
+    """Ставит задачу в очередь и сразу возвращает управление.
+
+    Если задача с тем же dedup_key ещё не выполнена, новая не создаётся
+    и возвращается уже поставленная.
+    """
+    if name not in registry:
+        raise KeyError(f'Неизвестная задача {name}')
+    job = Job(name=name, payload=json.dumps(kwargs), priority=priority,
+              dedup_key=dedup_key,
+              run_at=timezone.now() + timedelta(seconds=delay))
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        existing = Job.objects.filter(dedup_key=dedup_key).first()
+        if existing is not None:
+            return existing
+        # Прежняя задача успела выполниться и освободить dedup_key.
+        return enqueue(name, priority, dedup_key, delay, **kwargs)
+    if settings.JOBS_EAGER:
+        Job.objects.filter(pk=job.pk).update(status=Job.RUNNING, attempts=1)
+        run_job(job.pk)
+    return job
+
+
+def claim(limit):
+    """Забирает до limit готовых к запуску задач для этого воркера.
+
+    Задачу забирает тот, чей UPDATE первым сменил статус, поэтому
+    несколько воркеров не выполнят одну задачу дважды.
+    """
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=timezone.now()
+    ).order_by('-priority', 'run_at').values_list('pk', flat=True)[:limit]
+    return [
+        pk for pk in candidates
+        if Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, attempts=F('attempts') + 1,
+            updated=timezone.now())
+    ]
+
+
+def backoff(attempts):
+    return timedelta(seconds=settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def run_job(pk):
+    """Выполняет задачу и записывает результат; ошибки ведут к повтору."""
+    job = Job.objects.get(pk=pk)
+    try:
+        registry[job.name](**json.loads(job.payload))
+    except Exception:
+        logger.exception('Задача %s завершилась ошибкой', job)
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + backoff(job.attempts)
+        else:
+            job.status = Job.FAILED
+            job.dedup_key = None
+    else:
+        job.status = Job.DONE
+        job.dedup_key = None
+    job.save()
+    return job.status
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи, чей воркер пропал посреди работы."""
+    stale = timezone.now() - timedelta(seconds=settings.JOBS_STALE_SECONDS)
+    return Job.objects.filter(
+        status=Job.RUNNING, updated__lt=stale).update(status=Job.QUEUED)
+
+
+def run_pending(limit=100):
+    """Синхронно выполняет готовые задачи, удобно для тестов и cron."""
+    return [run_job(pk) for pk in claim(limit)]
@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.core import mail
+from django.db import IntegrityError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import User
+
+from ..models import Job
+from ..queue import enqueue, run_pending, task
+
+calls = []
+
+
+@task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task('tests.fail')
+def fail():
+    raise RuntimeError('Сбой')
+
+
+@override_settings(JOBS_EAGER=False, JOBS_RETRY_DELAY=0)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_run_by_priority(self):
+        """Задачи с большим приоритетом выполняются первыми."""
+        enqueue('tests.record', value='low')
+        enqueue('tests.record', value='high', priority=10)
+        self.assertEqual(run_pending(), [Job.DONE, Job.DONE])
+        self.assertEqual(calls, ['high', 'low'])
+
+    def test_dedup_key(self):
+        """Пока задача не выполнена, дубль с тем же ключом не ставится."""
+        first = enqueue('tests.record', value=1, dedup_key='key')
+        second = enqueue('tests.record', value=2, dedup_key='key')
+        self.assertEqual(first.pk, second.pk)
+        run_pending()
+        enqueue('tests.record', value=3, dedup_key='key')
+        run_pending()
+        self.assertEqual(calls, [1, 3])
+
+    def test_dedup_key_freed_during_enqueue(self):
+        """Если дубль выполнился между INSERT и поиском, задача ставится
+        заново, а не падает."""
+        enqueue('tests.record', value=1, dedup_key='key')
+        run_pending()
+        save = Job.save
+
+        def collide_once(job, *args, **kwargs):
+            # INSERT столкнулся с дублем, который затем выполнился.
+            Job.save = save
+            raise IntegrityError('UNIQUE constraint failed')
+        with mock.patch.object(Job, 'save', collide_once):
+            job = enqueue('tests.record', value=2, dedup_key='key')
+        self.assertEqual(job.status, Job.QUEUED)
+        run_pending()
+        self.assertEqual(calls, [1, 2])
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        """Упавшая задача повторяется max_attempts раз."""
+        job = enqueue('tests.fail')
+        Job.objects.filter(pk=job.pk).update(max_attempts=2)
+        self.assertEqual(run_pending(), [Job.QUEUED])
+        self.assertEqual(run_pending(), [Job.FAILED])
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('Сбой', job.last_error)
+
+    def test_password_reset_email_is_sent_in_background(self):
+        """Письмо сброса пароля уходит из воркера, а не из запроса."""
+        User.objects.create_user(
+            username='auth', email='auth@example.com', password='pass')
+        Client().post(reverse('users:password_reset'),
+                      {'email': 'auth@example.com'})
+        self.assertEqual(len(mail.outbox), 0)
+        run_pending()
+        self.assertEqual(mail.outbox[0].to, ['auth@example.com'])
+
+    @override_settings(JOBS_EAGER=True)
+    def test_password_reset_email_is_sent_without_worker(self):
+        """С JOBS_EAGER письмо уходит сразу, без run_jobs."""
+        User.objects.create_user(
+            username='auth', email='auth@example.com', password='pass')
+        Client().post(reverse('users:password_reset'),
+                      {'email': 'auth@example.com'})
+        self.assertEqual(mail.outbox[0].to, ['auth@example.com'])
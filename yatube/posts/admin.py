@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import graph
 from .models import Comment, Follow, Group, Post
 
 
@@ -33,3 +34,9 @@ class Follow(admin.ModelAdmin):
     search_fields = ('author', 'user')
     empty_value_display = '-пусто-'
     list_filter = ('author', 'user')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Новых участников связи сбрасывает post_save, прежних - здесь.
+        graph.invalidate({form.initial.get('user')} - {None},
+                         {form.initial.get('author')} - {None})
@@ -0,0 +1,115 @@
+from itertools import chain
+
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+from .sharding import posts_for_id, scatter
+
+
+def archive_batch(using, before, batch_size):
+    """Переносит в архив одну пачку самых старых постов с комментариями."""
+    with transaction.atomic(using=using):
+        posts = list(
+            Post.objects.using(using).filter(
+                pub_date__lt=before).order_by('pub_date')[:batch_size])
+        if not posts:
+            return 0
+        post_ids = [post.pk for post in posts]
+        ArchivedPost.objects.using(using).bulk_create(
+            ArchivedPost(id=post.pk, text=post.text, pub_date=post.pub_date,
+                         author_id=post.author_id, group_id=post.group_id,
+                         image=post.image.name, views=post.views,
+                         text_html=post.text_html, excerpt=post.excerpt,
+                         image_width=post.image_width,
+                         image_height=post.image_height,
+                         image_color=post.image_color,
+                         image_placeholder=post.image_placeholder)
+            for post in posts)
+        ArchivedComment.objects.using(using).bulk_create(
+            ArchivedComment(id=comment.pk, post_id=comment.post_id,
+                            author_id=comment.author_id, text=comment.text,
+                            created=comment.created)
+            for comment in Comment.objects.using(using).filter(
+                post_id__in=post_ids))
+        Post.objects.using(using).filter(pk__in=post_ids).delete()
+    return len(posts)
+
+
+def archive_posts(before, batch_size=500):
+    """Переносит посты старше before в архив пачками на каждом шарде.
+
+    Каждая пачка - отдельная короткая транзакция, чтобы не держать
+    блокировку записи на всё время переноса.
+    """
+    archived = 0
+    for alias in settings.POST_SHARDS:
+        while True:
+            moved = archive_batch(alias, before, batch_size)
+            archived += moved
+            if moved < batch_size:
+                break
+    return archived
+
+
+def get_post_or_404(post_id, deferred=()):
+    """Пост по id из активной таблицы, а если его там нет - из архива.
+
+    deferred - поля, которые не нужно читать сразу.
+    """
+    post = posts_for_id(post_id).filter(pk=post_id).defer(*deferred).first()
+    if post is not None:
+        return post
+    post = posts_for_id(post_id, ArchivedPost).filter(
+        pk=post_id).defer(*deferred).first()
+    if post is None:
+        raise Http404('Пост не найден.')
+    return post
+
+
+def with_archive(build=None):
+    """Лента из активных постов, которая продолжается архивными."""
+    return ChainedQuerySet(scatter(Post, build),
+                           scatter(ArchivedPost, build))
+
+
+class ChainedQuerySet:
+    """Несколько отсортированных выборок, идущих одна за другой.
+
+    Архивные посты всегда старше активных, поэтому ленту можно не сливать,
+    а просто продолжить: первые страницы читают только активную таблицу.
+    """
+    ordered = True
+
+    def __init__(self, *querysets):
+        self.querysets = querysets
+        self._counts = None
+
+    def counts(self):
+        if self._counts is None:
+            self._counts = [queryset.count() for queryset in self.querysets]
+        return self._counts
+
+    def count(self):
+        return sum(self.counts())
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return chain(*self.querysets)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        if stop is None:
+            stop = self.count()
+        result = []
+        for queryset, count in zip(self.querysets, self.counts()):
+            if start < count and stop > 0:
+                result.extend(queryset[max(start, 0):min(stop, count)])
+            start -= count
+            stop -= count
+        return result
@@ -0,0 +1,313 @@
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import serializers
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import (Case, DateTimeField, F, IntegerField, Q,
+                              Value, When)
+from django.utils import timezone
+
+from core.buffers import BufferedWriter
+from core.purge import expire
+
+from . import graph, surrogate
+from .models import Comment, Follow, Post
+from .sharding import (db_for_post, is_sharded, next_id, post_author_id,
+                       posts_for_id)
+from .signals import comments_changed
+from .tasks import queue_trending
+
+
+# Сколько держать в кэше записанные в базу просмотры поста. Сброс
+# буфера этого процесса прибавляет к ним записанное, сбросы других
+# процессов подхватываются не позже чем через VIEWS_CACHE_SECONDS.
+VIEWS_CACHE_SECONDS = 60
+
+
+def comment_key(comment):
+    """Повторная отправка того же текста не создаёт второй комментарий."""
+    return comment.post_id, comment.author_id, comment.text
+
+
+def restore_created(submitted, since, using):
+    """Возвращает комментариям шарда время отправки вместо времени
+    сброса.
+
+    auto_now_add при вставке ставит текущее время, поэтому время из
+    буфера записывается отдельным UPDATE. Вставленные строки отличаются
+    от старых с тем же текстом тем, что созданы после since.
+    """
+    whens = [When(Q(post_id=comment.post_id, author_id=comment.author_id,
+                    text=comment.text), then=Value(created))
+             for comment, created in submitted]
+    Comment.objects.using(using).filter(
+        Q(*[when.condition for when in whens], _connector=Q.OR),
+        created__gte=since).update(
+        created=Case(*whens, default=F('created'),
+                     output_field=DateTimeField()))
+
+
+class CommentBuffer(BufferedWriter):
+    def write(self, items):
+        """Одна транзакция на шард: вставка, время отправки и сброс
+        кэшей страниц.
+
+        Записанные шарды сразу убираются из items, и при ошибке в буфер
+        возвращаются только комментарии незаписанных шардов.
+        """
+        started = timezone.now()
+        submitted = [(comment, comment.created) for comment in items.values()]
+        by_shard = defaultdict(list)
+        for comment, created in submitted:
+            by_shard[db_for_post(comment.post_id)].append((comment, created))
+        try:
+            for alias, shard_comments in by_shard.items():
+                comments = [comment for comment, _ in shard_comments]
+                if is_sharded():
+                    # bulk_create не посылает pre_save, который выдаёт id.
+                    for comment in comments:
+                        if comment.pk is None:
+                            comment.pk = next_id(post_author_id(comment))
+                with transaction.atomic(using=alias):
+                    Comment.objects.using(alias).bulk_create(comments)
+                    restore_created(shard_comments, started, alias)
+                    comments_changed(comments)
+                for comment in comments:
+                    del items[comment_key(comment)]
+        finally:
+            for comment, created in submitted:
+                comment.created = created
+
+    def dump(self, items):
+        return serializers.serialize('json', items.values())
+
+    def load(self, data):
+        comments = (obj.object
+                    for obj in serializers.deserialize('json', data))
+        return {comment_key(comment): comment for comment in comments}
+
+    def for_post(self, post_id):
+        return [comment for comment in self.pending().values()
+                if comment.post_id == post_id]
+
+
+class FollowBuffer(BufferedWriter):
+    """Подписки и отписки: по паре (user_id, author_id) побеждает
+    последнее действие."""
+
+    def write(self, items):
+        follows = [Follow(user_id=user_id, author_id=author_id)
+                   for (user_id, author_id), following in items.items()
+                   if following]
+        unfollows = Q()
+        for (user_id, author_id), following in items.items():
+            if not following:
+                unfollows |= Q(user_id=user_id, author_id=author_id)
+        with transaction.atomic():
+            Follow.objects.bulk_create(follows, ignore_conflicts=True)
+            if unfollows:
+                delete_follows(Follow.objects.filter(unfollows))
+        graph.invalidate({user_id for user_id, _ in items},
+                         {author_id for _, author_id in items})
+
+    def for_user(self, user_id):
+        """Несброшенные изменения подписок: {author_id: подписан ли}."""
+        return {author_id: following
+                for (follower_id, author_id), following
+                in self.pending().items() if follower_id == user_id}
+
+
+class ViewBuffer(BufferedWriter):
+    """Просмотры постов {post_id: сколько добавить}.
+
+    Таймера нет: буфер сбрасывает тот просмотр, который пришёл через
+    VIEWS_FLUSH_SECONDS после прошлого сброса. При остановке процесса
+    несброшенные просмотры теряются - для счётчика это допустимо.
+    """
+    flush_interval = 0
+
+    def __init__(self):
+        super().__init__()
+        self._flushed_at = time.monotonic()
+
+    @property
+    def max_items(self):
+        return settings.VIEWS_MAX_ITEMS
+
+    def bump(self, post_id):
+        self.accumulate(post_id, 1)
+        with self._lock:
+            due = (time.monotonic() - self._flushed_at
+                   >= settings.VIEWS_FLUSH_SECONDS)
+        if due:
+            try:
+                self.flush()
+            except DatabaseError:
+                # Уже записано в лог; просмотры остались в буфере.
+                pass
+
+    def flush(self):
+        with self._lock:
+            self._flushed_at = time.monotonic()
+        super().flush()
+
+    def merge(self, unwritten, newer):
+        return unwritten + newer
+
+    def write(self, items):
+        """Один UPDATE на шард: каждому посту - своя прибавка.
+
+        Записанные шарды сразу убираются из items, и при ошибке в буфер
+        возвращается только незаписанное. Рейтинг популярного обновляет
+        фоновая задача, а не запрос, на котором сработал сброс.
+        """
+        by_shard = defaultdict(dict)
+        for post_id, delta in items.items():
+            by_shard[db_for_post(post_id)][post_id] = delta
+        weight = settings.TRENDING_WEIGHTS['view']
+        weights = {}
+        for alias, deltas in by_shard.items():
+            Post.objects.using(alias).filter(pk__in=deltas).update(
+                views=F('views') + Case(
+                    *[When(pk=post_id, then=Value(delta))
+                      for post_id, delta in deltas.items()],
+                    default=Value(0), output_field=IntegerField()))
+            for post_id, delta in deltas.items():
+                try:
+                    cache.incr(views_key(post_id), delta)
+                except ValueError:
+                    # Просмотров поста нет в кэше.
+                    pass
+                del items[post_id]
+                weights[post_id] = weight * delta
+        queue_trending(weights)
+
+
+comments = CommentBuffer('posts.buffers.comments')
+follows = FollowBuffer('posts.buffers.follows')
+views = ViewBuffer()
+
+
+def save_comment(comment):
+    if not settings.WRITE_BEHIND_ENABLED:
+        comment.save()
+        return
+    comment.created = timezone.now()
+    comments.add(comment_key(comment), comment)
+    # Оболочка страницы поста закэширована без нового комментария.
+    expire([surrogate.post_key(comment.post_id)])
+
+
+def delete_follows(queryset):
+    """Удаляет подписки одним DELETE, без выборки строк для сигналов.
+
+    Граф подписок вызывающий сбрасывает сам; сигналы Follow нужны только
+    админке и каскадному удалению.
+    """
+    queryset._raw_delete(queryset.db)
+
+
+def set_following(user, author, following):
+    """Подписка и отписка одним запросом; повтор ничего не меняет."""
+    if settings.WRITE_BEHIND_ENABLED:
+        follows.add((user.pk, author.pk), following)
+        return
+    if following:
+        Follow.objects.bulk_create(
+            [Follow(user=user, author=author)], ignore_conflicts=True)
+    else:
+        delete_follows(Follow.objects.filter(user=user, author=author))
+    graph.invalidate([user.pk], [author.pk])
+
+
+def follow_many(user, author_ids):
+    """Подписывает user на всех author_ids пачками по FOLLOW_CHUNK_SIZE.
+
+    Каждая пачка - один INSERT, который пропускает уже существующие
+    подписки. Возвращает число новых подписок.
+    """
+    follows.flush()
+    author_ids = sorted(set(author_ids) - {user.pk})
+    before = user.follower.count()
+    chunk_size = settings.FOLLOW_CHUNK_SIZE
+    for start in range(0, len(author_ids), chunk_size):
+        Follow.objects.bulk_create(
+            [Follow(user=user, author_id=author_id)
+             for author_id in author_ids[start:start + chunk_size]],
+            ignore_conflicts=True)
+    graph.invalidate([user.pk], author_ids)
+    return user.follower.count() - before
+
+
+def following_authors(user, author_ids):
+    """Те из author_ids, на кого подписан user, с учётом несброшенных
+    записей; в базу не ходит, пока граф подписок в кэше."""
+    authors = graph.follows_many(user.pk, author_ids)
+    for author_id, following in follows.for_user(user.pk).items():
+        if following and author_id in author_ids:
+            authors.add(author_id)
+        else:
+            authors.discard(author_id)
+    return authors
+
+
+def is_following(user, author):
+    """Подписан ли user на author с учётом несброшенных записей."""
+    return author.pk in following_authors(user, {author.pk})
+
+
+def followed_author_ids(user):
+    authors = set(graph.followees(user.pk))
+    for author_id, following in follows.for_user(user.pk).items():
+        if following:
+            authors.add(author_id)
+        else:
+            authors.discard(author_id)
+    return list(authors)
+
+
+def viewer_key(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    if request.session.session_key:
+        return f'session:{request.session.session_key}'
+    return f'ip:{request.META.get("REMOTE_ADDR")}'
+
+
+def views_key(post_id):
+    return f'post_views:{post_id}'
+
+
+def stored_views(post_id):
+    """Просмотры поста, уже записанные в базу, или None, если поста нет.
+
+    Читаются из кэша, чтобы страница поста из оболочки не ходила в
+    базу.
+    """
+    key = views_key(post_id)
+    stored = cache.get(key)
+    if stored is None:
+        stored = posts_for_id(post_id).filter(pk=post_id).values_list(
+            'views', flat=True).first()
+        if stored is None:
+            return None
+        cache.add(key, stored, VIEWS_CACHE_SECONDS)
+    return stored
+
+
+def count_view(request, post_id):
+    """Засчитывает просмотр, если этот зритель не смотрел пост недавно.
+
+    Возвращает число просмотров с учётом ещё не сброшенных в базу или
+    None, если поста нет.
+    """
+    stored = stored_views(post_id)
+    if stored is None:
+        return None
+    window = settings.VIEWS_DEDUP_SECONDS
+    if not window or cache.add(
+            f'viewed:{viewer_key(request)}:{post_id}', 1, window):
+        views.bump(post_id)
+    return stored + views.pending().get(post_id, 0)
@@ -0,0 +1,88 @@
+import heapq
+from datetime import datetime, timedelta
+from itertools import islice
+from operator import attrgetter
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ArchivedPost, Post
+from .rendering import for_cards
+from .sharding import scatter
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(post):
+    """Курсор следующей страницы: позиция последнего показанного поста."""
+    microseconds = (post.pub_date - EPOCH) // timedelta(microseconds=1)
+    return f'{microseconds}-{post.pk}'
+
+
+def decode_cursor(value):
+    try:
+        microseconds, pk = map(int, value.split('-'))
+    except (AttributeError, ValueError):
+        return None
+    return EPOCH + timedelta(microseconds=microseconds), pk
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def unique(posts):
+    seen = set()
+    for post in posts:
+        if post.pk not in seen:
+            seen.add(post.pk)
+            yield post
+
+
+def merged_feed(builds, cursor=None, limit=None):
+    """Страница ленты, слитой из нескольких источников по pub_date.
+
+    Каждый источник (build получает менеджер модели, как в scatter)
+    отдаёт не больше limit постов после курсора, поэтому цена страницы
+    зависит от числа источников и размера страницы, но не от того,
+    сколько постов у авторов и групп. Пост из нескольких источников
+    показывается один раз. Архив читается, только если активных постов
+    не хватило на страницу.
+    """
+    limit = limit or settings.POSTS_ON_PAGE
+    position = decode_cursor(cursor) if cursor else None
+
+    def source(build):
+        def build_after(posts):
+            posts = for_cards(build(posts).select_related(
+                'group', 'author')).order_by('-pub_date', '-pk')
+            if position is None:
+                return posts
+            pub_date, pk = position
+            return posts.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk))
+        return build_after
+
+    page = []
+    for model in (Post, ArchivedPost):
+        wanted = limit + 1 - len(page)
+        sources = [scatter(model, source(build))[:wanted] for build in builds]
+        page.extend(islice(unique(heapq.merge(
+            *sources, key=attrgetter('pub_date', 'pk'), reverse=True)),
+            wanted))
+        if len(page) > limit:
+            break
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return CursorPage(page[:limit], next_cursor)
@@ -13,3 +13,13 @@ class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+
+class FollowImportForm(forms.Form):
+    usernames = forms.CharField(
+        label='Имена пользователей',
+        help_text='Через пробел, запятую или с новой строки',
+        widget=forms.Textarea)
+
+    def clean_usernames(self):
+        return set(self.cleaned_data['usernames'].replace(',', ' ').split())
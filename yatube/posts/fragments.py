@@ -0,0 +1,103 @@
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from core.holes import fragment
+
+from . import buffers, graph, lookups, reactions
+from .forms import CommentForm
+from .models import Reaction
+
+
+@fragment('header')
+def header(request):
+    return render_to_string('includes/header.html', request=request)
+
+
+@fragment('switcher')
+def switcher(request, tab=''):
+    return render_to_string('posts/includes/switcher.html',
+                            {tab: True} if tab else {}, request=request)
+
+
+@fragment('followed_badges')
+def followed_badges(request, author_ids):
+    """Открывает значки «вы подписаны» у карточек авторов, на которых
+    подписан пользователь: одна проверка на всю страницу."""
+    if not request.user.is_authenticated or not author_ids:
+        return ''
+    followed = buffers.following_authors(
+        request.user, {int(author_id) for author_id in author_ids.split(',')})
+    if not followed:
+        return ''
+    selectors = ','.join(f'.followed-badge[data-author="{author_id}"]'
+                         for author_id in sorted(followed))
+    return mark_safe(
+        f'<style>{selectors}{{display: inline-block !important}}</style>')
+
+
+@fragment('group_actions')
+def group_actions(request, slug):
+    group = lookups.groups.get(slug)
+    if group is None or not request.user.is_authenticated:
+        return ''
+    context = {
+        'group': group,
+        'following': group.followers.filter(user=request.user).exists(),
+    }
+    return render_to_string('posts/fragments/group_actions.html', context,
+                            request=request)
+
+
+@fragment('profile_actions')
+def profile_actions(request, username):
+    author = lookups.users.get(username)
+    if author is None:
+        return ''
+    context = {
+        'author': author,
+        'followers': graph.follower_count(author.pk),
+        'following': (request.user.is_authenticated
+                      and buffers.is_following(request.user, author)),
+    }
+    return render_to_string('posts/fragments/profile_actions.html', context,
+                            request=request)
+
+
+@fragment('post_views')
+def post_views(request, post_id):
+    views = buffers.count_view(request, int(post_id))
+    return '' if views is None else str(views)
+
+
+@fragment('reactions')
+def post_reactions(request, post_id):
+    post_id = int(post_id)
+    counts = reactions.counts(post_id)
+    mine = reactions.user_reactions(request.user, post_id)
+    context = {
+        'post_id': post_id,
+        'reactions': [(kind, label, counts.get(kind, 0), kind in mine)
+                      for kind, label in Reaction.KINDS],
+    }
+    return render_to_string('posts/fragments/reactions.html', context,
+                            request=request)
+
+
+@fragment('post_actions')
+def post_actions(request, post_id, author_id):
+    if request.user.pk != int(author_id):
+        return ''
+    return format_html(
+        '<a class="btn btn-primary" href="{}">редактировать запись</a>',
+        reverse('posts:post_edit', args=(post_id,)))
+
+
+@fragment('comment_form')
+def comment_form(request, post_id):
+    if not request.user.is_authenticated:
+        return ''
+    context = {'post_id': post_id, 'form': CommentForm()}
+    return render_to_string('posts/fragments/comment_form.html', context,
+                            request=request)
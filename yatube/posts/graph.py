@@ -0,0 +1,74 @@
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+
+from .models import Follow
+
+
+def primary_follows():
+    return Follow.objects.using(router.db_for_write(Follow))
+
+
+def followees_key(user_id):
+    return f'followees:{user_id}'
+
+
+def followees(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id.
+
+    Загружается одним запросом при первом обращении и живёт в кэше до
+    подписки или отписки пользователя, но не дольше
+    FOLLOW_GRAPH_SECONDS. Читается с основной базы:
+    отстающая реплика надолго оставила бы в кэше старый граф.
+    """
+    key = followees_key(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = array('l', primary_follows().filter(user_id=user_id).order_by(
+            'author_id').values_list('author_id', flat=True))
+        cache.set(key, ids, settings.FOLLOW_GRAPH_SECONDS)
+    return ids
+
+
+def contains(ids, author_id):
+    index = bisect_left(ids, author_id)
+    return index < len(ids) and ids[index] == author_id
+
+
+def follows(user_id, author_id):
+    return contains(followees(user_id), author_id)
+
+
+def follows_many(user_id, author_ids):
+    """Те из author_ids, на кого подписан user_id: без запросов к базе,
+    если массив уже в кэше."""
+    ids = followees(user_id)
+    return {author_id for author_id in author_ids
+            if contains(ids, author_id)}
+
+
+def followers_key(author_id):
+    return f'followers:{author_id}'
+
+
+def follower_count(author_id):
+    key = followers_key(author_id)
+    count = cache.get(key)
+    if count is None:
+        count = primary_follows().filter(author_id=author_id).count()
+        cache.set(key, count, settings.FOLLOW_GRAPH_SECONDS)
+    return count
+
+
+def invalidate(user_ids, author_ids=()):
+    """Сбрасывает подписки user_ids и счётчики подписчиков author_ids.
+
+    Одиночные записи в Follow сбрасывают граф через сигналы; массовые
+    вставки сигналов не посылают и вызывают эту функцию сами.
+    """
+    cache.delete_many(
+        [followees_key(user_id) for user_id in user_ids]
+        + [followers_key(author_id) for author_id in author_ids])
@@ -0,0 +1,123 @@
+import base64
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .models import ArchivedPost, Post
+
+logger = logging.getLogger(__name__)
+
+# Пропорции заглушки совпадают с превью 960x339 в шаблонах.
+PLACEHOLDER_SIZE = (8, 3)
+PREVIEW_SIZE = (64, 64)
+ERRORS = (OSError, SuspiciousFileOperation, Image.DecompressionBombError)
+FIELDS = ['image_width', 'image_height', 'image_color', 'image_placeholder']
+# Цвет картинки, которую не удалось прочитать: серый, как у заглушки в
+# шаблоне. По нему сохранение поста не открывает файл снова.
+UNREADABLE_COLOR = '#e9ecef'
+UNREADABLE = {'image_width': None, 'image_height': None,
+              'image_color': UNREADABLE_COLOR, 'image_placeholder': ''}
+# Значения EXIF Orientation, при которых картинка повёрнута на 90°.
+EXIF_ORIENTATION = 0x0112
+ROTATED = {5, 6, 7, 8}
+
+
+def dominant_color(image):
+    paletted = image.quantize(colors=8)
+    _, index = max(paletted.getcolors())
+    red, green, blue = paletted.getpalette()[index * 3:index * 3 + 3]
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def placeholder(image):
+    """Картинка 8x3 в data URI: браузер растягивает её в размытый фон
+    до загрузки превью."""
+    tiny = ImageOps.fit(image, PLACEHOLDER_SIZE, Image.BOX)
+    buffer = BytesIO()
+    tiny.save(buffer, 'PNG', optimize=True)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+def analyze(file):
+    """Размеры, основной цвет и заглушка картинки из открытого файла.
+
+    JPEG декодируется сразу в уменьшенном виде, поэтому большие
+    фотографии не разворачиваются в память целиком. Размеры и превью
+    учитывают поворот из EXIF, как его покажет браузер.
+    """
+    with Image.open(file) as image:
+        width, height = image.size
+        if image.getexif().get(EXIF_ORIENTATION) in ROTATED:
+            width, height = height, width
+        image.draft('RGB', PREVIEW_SIZE)
+        preview = ImageOps.exif_transpose(image).convert('RGB')
+    preview.thumbnail(PREVIEW_SIZE)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_color': dominant_color(preview),
+        'image_placeholder': placeholder(preview),
+    }
+
+
+def fill_metadata(post):
+    """Заполняет данные картинки при загрузке новой или если их ещё нет.
+
+    Файл, который не удалось прочитать, получает UNREADABLE_COLOR и
+    пустые размеры: шаблон рисует серую заглушку, а следующие
+    сохранения файл уже не открывают.
+    """
+    if not post.image:
+        post.image_width = post.image_height = None
+        post.image_color = post.image_placeholder = ''
+        return
+    if post.image._committed and post.image_color:
+        return
+    try:
+        post.image.open('rb')
+        try:
+            metadata = analyze(post.image)
+        finally:
+            if post.image._committed:
+                post.image.close()
+            else:
+                post.image.seek(0)
+    except ERRORS:
+        logger.warning('Не удалось прочитать картинку %s', post.image.name)
+        metadata = UNREADABLE
+    for field, value in metadata.items():
+        setattr(post, field, value)
+
+
+def backfill(chunk_size=100):
+    """Заполняет данные картинок уже опубликованных постов пачками по
+    id, по одному UPDATE на пачку."""
+    analyzed = 0
+    for alias in settings.POST_SHARDS:
+        for model in (Post, ArchivedPost):
+            posts = model.objects.using(alias).exclude(image='').filter(
+                image_color='').order_by('pk').values_list('pk', 'image')
+            last_pk = 0
+            while True:
+                chunk = list(posts.filter(pk__gt=last_pk)[:chunk_size])
+                if not chunk:
+                    break
+                updated = []
+                for pk, name in chunk:
+                    try:
+                        with default_storage.open(name) as file:
+                            metadata = analyze(file)
+                    except ERRORS:
+                        logger.warning('Не удалось прочитать картинку %s',
+                                       name)
+                        metadata = UNREADABLE
+                    updated.append(model(pk=pk, **metadata))
+                model.objects.using(alias).bulk_update(updated, FIELDS)
+                last_pk = chunk[-1][0]
+                analyzed += len(updated)
+    return analyzed
@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Post
+from .sharding import scatter
+
+# Пост может закоммититься позже, чем наступила его pub_date, поэтому
+# каждый опрос захватывает и немного уже просмотренного времени.
+OVERLAP = timedelta(seconds=2)
+
+
+def event_for(post):
+    return {
+        'id': post.pk,
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'time': post.pub_date.timestamp(),
+    }
+
+
+class Broadcaster:
+    """Раздаёт события о новых постах всем открытым потокам процесса.
+
+    Базу опрашивает не каждый клиент, а тот, кто первым заметил, что
+    прошло SSE_POLL_SECONDS с прошлого опроса; остальные ждут результата
+    на общем условии. Последние SSE_BACKLOG событий хранятся в памяти,
+    чтобы переподключившийся клиент получил пропущенное.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._events = deque()
+        self._seen = set()
+        self._latest = None
+        self._last_poll = 0
+        self._polling = False
+
+    def events_since(self, cursor):
+        with self._condition:
+            return [event for event in self._events
+                    if event['time'] > cursor]
+
+    def fetch(self, since):
+        posts = scatter(Post, lambda queryset: queryset.filter(
+            pub_date__gt=since).select_related('author', 'group').order_by(
+            '-pub_date', '-pk'))
+        return list(posts)[::-1]
+
+    def publish(self, events):
+        with self._condition:
+            for event in events:
+                if event['id'] in self._seen:
+                    continue
+                self._events.append(event)
+                self._seen.add(event['id'])
+            while len(self._events) > settings.SSE_BACKLOG:
+                self._seen.discard(self._events.popleft()['id'])
+            self._condition.notify_all()
+
+    def poll(self):
+        since = self._latest or timezone.now() - timedelta(
+            seconds=settings.SSE_TIMEOUT)
+        posts = self.fetch(since - OVERLAP)
+        if posts:
+            self._latest = max(since, posts[-1].pub_date)
+        self.publish(event_for(post) for post in posts)
+
+    def wait(self, cursor, timeout):
+        """События новее cursor; ждёт их не дольше timeout секунд."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._condition:
+                events = self.events_since(cursor)
+                if events:
+                    return events
+                remaining = deadline - time.monotonic()
+                due = (self._last_poll + settings.SSE_POLL_SECONDS
+                       - time.monotonic())
+                if due <= 0 and not self._polling:
+                    self._polling = True
+                elif remaining <= 0:
+                    return []
+                else:
+                    self._condition.wait(min(remaining, max(due, 0.1)))
+                    continue
+            try:
+                self.poll()
+            finally:
+                with self._condition:
+                    self._polling = False
+                    self._last_poll = time.monotonic()
+                    self._condition.notify_all()
+
+
+broadcaster = Broadcaster()
+
+
+def stream(cursor, accept, timeout=None):
+    """Текст потока text/event-stream с событиями, прошедшими accept.
+
+    Поток закрывается через SSE_TIMEOUT секунд, браузер сам
+    переподключится с Last-Event-ID и ничего не потеряет.
+    """
+    timeout = settings.SSE_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    yield 'retry: 3000\n\n'
+    while True:
+        remaining = deadline - time.monotonic()
+        events = broadcaster.wait(cursor, min(remaining, 15))
+        if events:
+            cursor = max(event['time'] for event in events)
+            events = [event for event in events if accept(event)]
+        if events:
+            yield (f'id: {cursor:.6f}\nevent: posts\n'
+                   f'data: {json.dumps(events)}\n\n')
+        else:
+            yield ': ping\n\n'
+        if remaining <= 0:
+            return
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import backfill
+
+
+class Command(BaseCommand):
+    help = ('Заполняет размеры, основной цвет и заглушки картинок '
+            'уже опубликованных постов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=100,
+            help='Сколько постов обновлять одним запросом.')
+
+    def handle(self, *args, **options):
+        analyzed = backfill(options['chunk_size'])
+        self.stdout.write(f'Обработано картинок: {analyzed}')
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.archive import archive_posts
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты и их комментарии в архивные таблицы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+            help='Архивировать посты старше N дней.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько постов переносить в одной транзакции.')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        archived = archive_posts(before, options['batch_size'])
+        self.stdout.write(f'Перенесено в архив постов: {archived}')
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Follow, User
+from posts.notifications import fan_out
+
+
+class Command(BaseCommand):
+    help = ('Замеряет раздачу уведомления о посте подписчикам: время '
+            'на каждую тысячу подписчиков при разном размере пачки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--followers', type=int, default=5000,
+            help='Сколько подписчиков у автора.')
+        parser.add_argument(
+            '--chunk-sizes', type=int, nargs='+', default=[100, 1000],
+            help='Размеры пачек для сравнения.')
+
+    def handle(self, *args, **options):
+        followers = options['followers']
+        with transaction.atomic():
+            author = User.objects.create_user(username='bench_fanout')
+            User.objects.bulk_create(
+                User(username=f'bench_fanout_{number}')
+                for number in range(followers))
+            Follow.objects.bulk_create(
+                Follow(user=user, author=author)
+                for user in User.objects.filter(
+                    username__startswith='bench_fanout_'))
+            for chunk_size in options['chunk_sizes']:
+                sid = transaction.savepoint()
+                start = time.perf_counter()
+                fan_out(1, author.pk, chunk_size)
+                elapsed = time.perf_counter() - start
+                transaction.savepoint_rollback(sid)
+                self.stdout.write(
+                    f'пачка {chunk_size}: {elapsed:.3f} с, '
+                    f'{elapsed * 1000 / followers * 1000:.1f} мс '
+                    f'на 1000 подписчиков')
+            transaction.set_rollback(True)
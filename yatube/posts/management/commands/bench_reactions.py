@@ -0,0 +1,89 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from django.test import override_settings
+from django.test.utils import setup_databases, teardown_databases
+
+from posts import reactions
+from posts.models import Post, Reaction, ReactionCounter, User
+
+
+class Command(BaseCommand):
+    help = ('Замеряет, сколько реакций в секунду принимает один '
+            'популярный пост при параллельной записи из нескольких '
+            'потоков, для разного числа частей счётчика.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=2000,
+            help='Сколько пользователей ставят реакцию.')
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Сколько потоков пишут одновременно.')
+        parser.add_argument(
+            '--shards', type=int, nargs='+', default=[1, 8],
+            help='Числа частей счётчика для сравнения.')
+
+    def react_all(self, users, post_id):
+        failed = 0
+        try:
+            for user in users:
+                while True:
+                    try:
+                        reactions.react(user, post_id, Reaction.LIKE)
+                        break
+                    except OperationalError:
+                        failed += 1
+        finally:
+            connections.close_all()
+        return failed
+
+    def handle(self, *args, **options):
+        # Замер идёт в одноразовой тестовой базе: потоки пишут каждый
+        # своим соединением, поэтому откатить их транзакцией нельзя.
+        # SQLite держим в файле, чтобы блокировки были как в рабочей.
+        test_settings = connections['default'].settings_dict['TEST']
+        name = test_settings['NAME']
+        with tempfile.TemporaryDirectory() as directory:
+            if connections['default'].vendor == 'sqlite':
+                test_settings['NAME'] = os.path.join(
+                    directory, 'bench_reactions.sqlite3')
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                self.measure(options)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+                test_settings['NAME'] = name
+
+    def measure(self, options):
+        author = User.objects.create_user(username='bench_reactions')
+        User.objects.bulk_create(
+            User(username=f'bench_reactions_{number}')
+            for number in range(options['users']))
+        users = list(User.objects.filter(
+            username__startswith='bench_reactions_'))
+        post = Post.objects.create(author=author, text='Популярный пост')
+        threads = options['threads']
+        for shards in options['shards']:
+            Reaction.objects.filter(post_id=post.pk).delete()
+            ReactionCounter.objects.filter(post_id=post.pk).delete()
+            cache.delete(reactions.counts_key(post.pk))
+            with override_settings(REACTION_COUNTER_SHARDS=shards):
+                start = time.perf_counter()
+                with ThreadPoolExecutor(threads) as pool:
+                    retries = sum(pool.map(
+                        self.react_all,
+                        [users[number::threads]
+                         for number in range(threads)],
+                        [post.pk] * threads))
+                elapsed = time.perf_counter() - start
+            total = reactions.counts(post.pk).get(Reaction.LIKE, 0)
+            self.stdout.write(
+                f'частей {shards}: {len(users) / elapsed:.0f} реакций/с, '
+                f'повторов из-за блокировок {retries}, '
+                f'итог счётчика {total} из {len(users)}')
@@ -0,0 +1,74 @@
+import random
+import time
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Follow, Group, GroupFollow, User
+from posts.recommendations import compute
+
+
+class Command(BaseCommand):
+    help = ('Замеряет расчёт рекомендаций «кого читать» на случайном '
+            'графе подписок. Граф создаётся в транзакции и откатывается.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=100000,
+            help='Сколько пользователей в графе.')
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Сколько авторов читает каждый пользователь.')
+        parser.add_argument(
+            '--groups', type=int, default=200,
+            help='Сколько групп; каждый подписан на три из них.')
+        parser.add_argument(
+            '--samples', type=int, default=100,
+            help='Для скольких пользователей считать рекомендации.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with transaction.atomic():
+            start = time.perf_counter()
+            User.objects.bulk_create(
+                (User(username=f'bench_rec_{number}')
+                 for number in range(options['users'])))
+            user_ids = list(User.objects.filter(
+                username__startswith='bench_rec_').values_list(
+                'pk', flat=True))
+            Group.objects.bulk_create(
+                Group(title=f'Группа {number}', slug=f'bench-rec-{number}',
+                      description='')
+                for number in range(options['groups']))
+            group_ids = list(Group.objects.filter(
+                slug__startswith='bench-rec-').values_list('pk', flat=True))
+            # Популярность авторов распределена неравномерно, как в жизни.
+            weights = list(accumulate(
+                1 / (rank + 1) for rank in range(len(user_ids))))
+            follows, group_follows = [], []
+            for user_id in user_ids:
+                authors = set(rng.choices(
+                    user_ids, cum_weights=weights, k=options['follows']))
+                authors.discard(user_id)
+                follows.extend(Follow(user_id=user_id, author_id=author_id)
+                               for author_id in authors)
+                group_follows.extend(
+                    GroupFollow(user_id=user_id, group_id=group_id)
+                    for group_id in rng.sample(group_ids, 3))
+            Follow.objects.bulk_create(follows)
+            GroupFollow.objects.bulk_create(group_follows)
+            self.stdout.write(
+                f'граф: {len(user_ids)} пользователей, {len(follows)} '
+                f'подписок за {time.perf_counter() - start:.1f} с')
+            timings = []
+            for user_id in rng.sample(user_ids, options['samples']):
+                start = time.perf_counter()
+                compute(user_id)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            self.stdout.write(
+                f'расчёт для пользователя: медиана '
+                f'{timings[len(timings) // 2] * 1000:.1f} мс, 95% '
+                f'{timings[int(len(timings) * 0.95)] * 1000:.1f} мс')
+            transaction.set_rollback(True)
@@ -0,0 +1,68 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from posts import markup
+from posts.models import Post, User
+from posts.rendering import for_cards
+
+PLAIN = ('Обычный пост без разметки, просто текст в несколько строк.\n'
+         'Вторая строка поста.\n\nИ ещё один абзац.')
+MARKDOWN = ('**Пост** с *разметкой*, `кодом` и [ссылкой](https://ya.ru).\n'
+            '- первый пункт\n- второй пункт\n\n> цитата\n\n'
+            '```\nprint("код")\n```')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время отрисовки страницы ленты для постов с '
+            'Markdown и без него, а также цену разметки на каждом показе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=200,
+            help='Сколько раз отрисовать каждую страницу.')
+
+    def page(self, author):
+        posts = for_cards(Post.objects.filter(
+            author=author).select_related('group', 'author'))
+        page = Paginator(posts, settings.POSTS_ON_PAGE).get_page(1)
+        page.object_list = list(page.object_list)
+        return page
+
+    def measure(self, render, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            render()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        repeat = options['repeat']
+        authors = {}
+        try:
+            for name, text in (('plain', PLAIN), ('markdown', MARKDOWN)):
+                author = User.objects.create_user(
+                    username=f'bench_render_{name}')
+                for _ in range(settings.POSTS_ON_PAGE):
+                    Post.objects.create(author=author, text=text)
+                authors[name] = author
+            for name, author in authors.items():
+                posts = self.page(author)
+                feed = self.measure(lambda: render_to_string(
+                    'posts/index.html',
+                    {'page_obj': posts, 'followed_authors': set()},
+                    request), repeat)
+                self.stdout.write(f'{name}: лента {feed:.2f} мс/страница')
+            texts = [MARKDOWN] * settings.POSTS_ON_PAGE
+            compile_each = self.measure(
+                lambda: [markup.render(text) for text in texts], repeat)
+            self.stdout.write(
+                f'разметка при каждом показе: +{compile_each:.2f} мс/страница')
+        finally:
+            User.objects.filter(username__startswith='bench_render_').delete()
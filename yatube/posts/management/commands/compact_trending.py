@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import compact
+
+
+class Command(BaseCommand):
+    help = ('Удаляет затухшие рейтинги популярного и пересобирает кэш. '
+            'Запускается по расписанию, например из cron.')
+
+    def handle(self, *args, **options):
+        deleted = compact()
+        self.stdout.write(f'Удалено рейтингов: {deleted}')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.tags import backfill
+
+
+class Command(BaseCommand):
+    help = 'Заполняет теги и упоминания для уже опубликованных постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Сколько постов индексировать в одной транзакции.')
+
+    def handle(self, *args, **options):
+        indexed = backfill(options['chunk_size'])
+        self.stdout.write(f'Проиндексировано постов: {indexed}')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.rendering import backfill
+
+
+class Command(BaseCommand):
+    help = 'Заполняет готовый HTML и анонс для уже опубликованных постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Сколько постов обновлять одним запросом.')
+
+    def handle(self, *args, **options):
+        rendered = backfill(options['chunk_size'])
+        self.stdout.write(f'Обработано постов: {rendered}')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.notifications import send_digests
+
+
+class Command(BaseCommand):
+    help = ('Рассылает письма о непрочитанных уведомлениях. '
+            'Запускается по расписанию, например из cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Сколько писем собирать и отправлять за раз.')
+
+    def handle(self, *args, **options):
+        sent = send_digests(options['chunk_size'])
+        self.stdout.write(f'Отправлено писем: {sent}')
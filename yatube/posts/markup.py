@@ -0,0 +1,164 @@
+import hashlib
+import re
+from html import unescape
+
+from django.core.cache import cache
+from django.utils.html import escape, strip_tags
+
+# Меняется вместе с правилами разметки, чтобы не отдавать старый кэш.
+VERSION = 1
+
+CODE_RE = re.compile(r'`([^`\n]+)`')
+LINK_RE = re.compile(r'\[([^\]\n]+)\]\(([^()\s]+)\)')
+BOLD_RE = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*')
+ITALIC_RE = re.compile(
+    r'(?<![\w*])\*(?=[^\s*])(.+?)(?<=[^\s*])\*(?![\w*])'
+    r'|(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)')
+LIST_RE = re.compile(r'^[-*] +(.*)$')
+QUOTE_RE = re.compile(r'^> ?(.*)$')
+FENCE = '```'
+SAFE_URL_RE = re.compile(r'^(?:https?://|mailto:|/(?!/)|#)', re.IGNORECASE)
+BREAK_RE = re.compile(r'<br>|</(?:p|li|blockquote|pre)>')
+
+
+def sanitize_url(url):
+    """Адрес ссылки, пригодный для href, или None.
+
+    Разрешены только http(s), mailto и ссылки внутри сайта: javascript:,
+    data: и прочие схемы не пропускаются ни в каком написании.
+    """
+    url = unescape(url)
+    if not SAFE_URL_RE.match(url) or any(
+            ord(char) < 32 or char.isspace() for char in url):
+        return None
+    return escape(url)
+
+
+def emphasis(text):
+    text = BOLD_RE.sub(r'<strong>\1</strong>', text)
+    return ITALIC_RE.sub(
+        lambda match: f'<em>{match.group(1) or match.group(2)}</em>', text)
+
+
+def render_spans(text):
+    result = []
+    position = 0
+    for match in LINK_RE.finditer(text):
+        result.append(emphasis(escape(text[position:match.start()])))
+        label = emphasis(escape(match.group(1)))
+        url = sanitize_url(match.group(2))
+        if url is None:
+            result.append(label)
+        else:
+            result.append(f'<a href="{url}" rel="nofollow">{label}</a>')
+        position = match.end()
+    result.append(emphasis(escape(text[position:])))
+    return ''.join(result)
+
+
+def render_inline(text):
+    """Строка с `кодом`, [ссылками](https://...), **жирным** и *курсивом*.
+
+    Весь текст экранируется до разметки, поэтому HTML автора попадает
+    на страницу только как текст.
+    """
+    parts = CODE_RE.split(text)
+    return ''.join(
+        f'<code>{escape(part)}</code>' if index % 2 else render_spans(part)
+        for index, part in enumerate(parts))
+
+
+class BlockRenderer:
+    """Собирает HTML из строк текста блок за блоком."""
+
+    def __init__(self):
+        self.blocks = []
+        self.paragraph, self.items, self.quote = [], [], []
+        self.code = None
+
+    def flush(self):
+        if self.paragraph:
+            self.blocks.append(f'<p>{"<br>".join(self.paragraph)}</p>')
+        if self.items:
+            self.blocks.append('<ul>{}</ul>'.format(
+                ''.join(f'<li>{item}</li>' for item in self.items)))
+        if self.quote:
+            self.blocks.append(
+                f'<blockquote>{"<br>".join(self.quote)}</blockquote>')
+        self.paragraph, self.items, self.quote = [], [], []
+
+    def close_code(self):
+        code = escape('\n'.join(self.code))
+        self.blocks.append(f'<pre><code>{code}</code></pre>')
+        self.code = None
+
+    def feed(self, line):
+        if line.strip() == FENCE:
+            if self.code is None:
+                self.flush()
+                self.code = []
+            else:
+                self.close_code()
+        elif self.code is not None:
+            self.code.append(line)
+        elif not line.strip():
+            self.flush()
+        else:
+            self.feed_text(line)
+
+    def feed_text(self, line):
+        item = LIST_RE.match(line)
+        quoted = QUOTE_RE.match(line)
+        if item and not (self.paragraph or self.quote):
+            self.items.append(render_inline(item.group(1)))
+        elif quoted and not (self.paragraph or self.items):
+            self.quote.append(render_inline(quoted.group(1)))
+        else:
+            if self.items or self.quote:
+                self.flush()
+            self.paragraph.append(render_inline(line))
+
+    def result(self):
+        if self.code is not None:
+            self.close_code()
+        self.flush()
+        return ''.join(self.blocks)
+
+
+def render(text):
+    """HTML из текста в подмножестве Markdown.
+
+    Абзацы разделяются пустой строкой, перенос строки внутри абзаца
+    сохраняется. Кроме выделения и ссылок поддерживаются списки
+    через «- », цитаты через «> » и блоки кода между ```.
+    """
+    renderer = BlockRenderer()
+    for line in text.replace('\r\n', '\n').split('\n'):
+        renderer.feed(line)
+    return renderer.result()
+
+
+def to_plain(html):
+    """Текст без разметки одной строкой, для анонсов."""
+    return ' '.join(unescape(strip_tags(BREAK_RE.sub(' ', html))).split())
+
+
+def cache_key(text):
+    digest = hashlib.sha1(text.encode()).hexdigest()
+    return f'markup:{VERSION}:{digest}'
+
+
+def render_many(texts):
+    """HTML для списка текстов через кэш по хэшу содержимого.
+
+    Одинаковый текст компилируется один раз на всех страницах; на весь
+    список уходит один get_many и один set_many в кэш.
+    """
+    keys = [cache_key(text) for text in texts]
+    cached = cache.get_many(keys)
+    missing = {key: render(text) for key, text in zip(keys, texts)
+               if key not in cached}
+    if missing:
+        cache.set_many(missing, None)
+    cached.update(missing)
+    return [cached[key] for key in keys]
@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('post_id', models.IntegerField(primary_key=True, serialize=False, verbose_name='id поста')),
+                ('score', models.FloatField(db_index=True, verbose_name='Рейтинг')),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0007_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupFollow',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='followers', to='posts.Group', verbose_name='Группа')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_follows', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='groupfollow',
+            constraint=models.UniqueConstraint(fields=('user', 'group'), name='unique_group_follow'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0008_group_follow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reaction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.IntegerField(verbose_name='id поста')),
+                ('kind', models.CharField(choices=[('like', 'Нравится'), ('heart', 'Люблю'), ('laugh', 'Смешно')], max_length=10, verbose_name='Реакция')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReactionCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.IntegerField(verbose_name='id поста')),
+                ('kind', models.CharField(choices=[('like', 'Нравится'), ('heart', 'Люблю'), ('laugh', 'Смешно')], max_length=10, verbose_name='Реакция')),
+                ('shard', models.PositiveSmallIntegerField(verbose_name='Часть')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='reactioncounter',
+            constraint=models.UniqueConstraint(fields=('post_id', 'kind', 'shard'), name='unique_reaction_counter'),
+        ),
+        migrations.AddField(
+            model_name='reaction',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddConstraint(
+            model_name='reaction',
+            constraint=models.UniqueConstraint(fields=('post_id', 'user', 'kind'), name='unique_reaction'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_reactions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='views',
+            field=models.PositiveIntegerField(default=0, verbose_name='Просмотры'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='views',
+            field=models.PositiveIntegerField(default=0, verbose_name='Просмотры'),
+        ),
+    ]
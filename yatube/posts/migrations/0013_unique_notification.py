@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:07
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicates(apps, schema_editor):
+    """Оставляет первое из уведомлений, доставленных повтором задачи."""
+    Notification = apps.get_model('posts', 'Notification')
+    first_ids = Notification.objects.values('user_id', 'post_id').annotate(
+        first_id=Min('id')).values('first_id')
+    Notification.objects.exclude(id__in=first_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_image_metadata'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('user', 'post_id'), name='unique_notification'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_unique_notification'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mention',
+            index=models.Index(fields=['post_id'], name='posts_menti_post_id_63bd5f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='posttag',
+            index=models.Index(fields=['post_id'], name='posts_postt_post_id_f425f1_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+from posts import markup
+from posts.rendering import make_excerpt
+
+CHUNK_SIZE = 500
+
+
+def render_existing(apps, schema_editor):
+    """Заполняет text_html и excerpt постов, созданных до 0011: без
+    них каждая карточка дочитывала отложенный text отдельным запросом."""
+    alias = schema_editor.connection.alias
+    for name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', name)
+        posts = model.objects.using(alias).filter(
+            text_html='').order_by('pk').only('text')
+        last_pk = 0
+        while True:
+            chunk = list(posts.filter(pk__gt=last_pk)[:CHUNK_SIZE])
+            if not chunk:
+                break
+            for post in chunk:
+                post.text_html = markup.render(post.text)
+                post.excerpt = make_excerpt(post.text_html)
+            model.objects.using(alias).bulk_update(
+                chunk, ['text_html', 'excerpt'])
+            last_pk = chunk[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_id_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(render_existing, migrations.RunPython.noop),
+    ]
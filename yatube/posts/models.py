@@ -1,9 +1,36 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, router
 
 User = get_user_model()
 
 
+class ShardAwareQuerySet(models.QuerySet):
+    """Без явного using() создаёт объекты на шарде автора поста."""
+
+    def create(self, **kwargs):
+        obj = self.model(**kwargs)
+        self._for_write = True
+        obj.save(force_insert=True, using=self._db)
+        return obj
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import sharding
+
+        if self._db is not None or not sharding.is_sharded():
+            return super().bulk_create(objs, *args, **kwargs)
+        by_shard = defaultdict(list)
+        for obj in objs:
+            if obj.pk is None:
+                obj.pk = sharding.next_id(sharding.post_author_id(obj))
+            by_shard[router.db_for_write(self.model, instance=obj)].append(
+                obj)
+        for alias, shard_objs in by_shard.items():
+            self.using(alias).bulk_create(shard_objs, *args, **kwargs)
+        return objs
+
+
 class Group(models.Model):
     title = models.CharField('Название группы', max_length=200,
                              help_text='Введите название группы')
@@ -23,6 +50,7 @@ class Post(models.Model):
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True,
+        db_index=True,
     )
     author = models.ForeignKey(
         User,
@@ -44,6 +72,22 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    views = models.PositiveIntegerField('Просмотры', default=0)
+    text_html = models.TextField('Текст в HTML', blank=True, editable=False)
+    excerpt = models.CharField('Анонс', max_length=200, blank=True,
+                               editable=False)
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, blank=True, editable=False)
+    image_color = models.CharField(
+        'Основной цвет картинки', max_length=7, blank=True, editable=False)
+    image_placeholder = models.TextField(
+        'Заглушка картинки', blank=True, editable=False)
+
+    objects = ShardAwareQuerySet.as_manager()
+
+    is_archived = False
 
     class Meta:
         ordering = ['-pub_date']
@@ -72,9 +116,11 @@ class Comment(models.Model):
         help_text='Введите текст комментария')
     created = models.DateTimeField(
         'Дата публикации',
-        auto_now_add=Truу,
+        auto_now_add=True,
     )
 
+    objects = ShardAwareQuerySet.as_manager()
+
     def __str__(self):
         return self.text[:15]
 
@@ -98,3 +144,214 @@ class Follow(models.Model):
     class Meta:
         constraints = [models.UniqueConstraint(fields=['user', 'author'],
                                                name='unique_follow')]
+
+
+class GroupFollow(models.Model):
+    user = models.ForeignKey(
+        User,
+        related_name='group_follows',
+        on_delete=models.CASCADE,
+        verbose_name='Подписчик')
+    group = models.ForeignKey(
+        Group,
+        related_name='followers',
+        on_delete=models.CASCADE,
+        verbose_name='Группа')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'group'],
+                                               name='unique_group_follow')]
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из Post командой archive_posts."""
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор поста'
+    )
+    group = models.ForeignKey(
+        Group,
+        related_name='archived_posts',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        verbose_name='Группа'
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    views = models.PositiveIntegerField('Просмотры', default=0)
+    text_html = models.TextField('Текст в HTML', blank=True, editable=False)
+    excerpt = models.CharField('Анонс', max_length=200, blank=True,
+                               editable=False)
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, blank=True, editable=False)
+    image_color = models.CharField(
+        'Основной цвет картинки', max_length=7, blank=True, editable=False)
+    image_placeholder = models.TextField(
+        'Заглушка картинки', blank=True, editable=False)
+
+    is_archived = True
+
+    class Meta:
+        ordering = ['-pub_date']
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        related_name='comments',
+        on_delete=models.CASCADE,
+        verbose_name='Ссылка на оригинальный пост')
+    author = models.ForeignKey(
+        User,
+        related_name='archived_comments',
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        verbose_name='Автор комментария')
+    text = models.TextField('Текст комментария')
+    created = models.DateTimeField('Дата публикации')
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class PostTag(models.Model):
+    """Хэштег поста. Хранит id поста, а не внешний ключ, чтобы тег
+    оставался и за архивным постом."""
+    post_id = models.IntegerField('id поста')
+    name = models.CharField('Тег', max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'post_id'],
+                                    name='unique_post_tag'),
+        ]
+        indexes = [models.Index(fields=['post_id'])]
+
+
+class Mention(models.Model):
+    """Упоминание пользователя в посте."""
+    post_id = models.IntegerField('id поста')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Упомянутый пользователь')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post_id'],
+                                    name='unique_mention'),
+        ]
+        indexes = [models.Index(fields=['post_id'])]
+
+
+class Reaction(models.Model):
+    """Реакция пользователя на пост; уникальный индекс не даёт
+    поставить одну реакцию дважды."""
+    LIKE = 'like'
+    HEART = 'heart'
+    LAUGH = 'laugh'
+    KINDS = (
+        (LIKE, 'Нравится'),
+        (HEART, 'Люблю'),
+        (LAUGH, 'Смешно'),
+    )
+    post_id = models.IntegerField('id поста')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+        verbose_name='Пользователь')
+    kind = models.CharField('Реакция', max_length=10, choices=KINDS)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post_id', 'user', 'kind'],
+                                    name='unique_reaction'),
+        ]
+
+
+class ReactionCounter(models.Model):
+    """Часть счётчика реакций поста.
+
+    Счётчик поста разбит на несколько строк, и каждая запись
+    увеличивает случайную из них, поэтому писатели популярного поста
+    не ждут блокировку одной строки. Итог - сумма строк.
+    """
+    post_id = models.IntegerField('id поста')
+    kind = models.CharField('Реакция', max_length=10,
+                            choices=Reaction.KINDS)
+    shard = models.PositiveSmallIntegerField('Часть')
+    count = models.IntegerField('Количество', default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post_id', 'kind', 'shard'],
+                                    name='unique_reaction_counter'),
+        ]
+
+
+class Notification(models.Model):
+    """Новый пост автора, на которого подписан пользователь."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор поста')
+    # Не внешний ключ: пост может лежать на другом шарде или в архиве.
+    post_id = models.IntegerField('id поста')
+    created = models.DateTimeField('Дата', auto_now_add=True)
+    is_read = models.BooleanField('Прочитано', default=False)
+    is_emailed = models.BooleanField('Отправлено в дайджесте', default=False)
+
+    class Meta:
+        ordering = ['-created']
+        indexes = [models.Index(fields=['user', 'is_read'])]
+        # Повтор задачи раздачи не доставляет уведомление дважды.
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post_id'],
+                                    name='unique_notification'),
+        ]
+
+
+class NotificationCounter(models.Model):
+    """Число непрочитанных уведомлений, чтобы не считать их COUNT(*)."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter')
+    unread = models.PositiveIntegerField('Непрочитано', default=0)
+
+
+class TrendingScore(models.Model):
+    """Затухающий рейтинг поста для ленты популярного.
+
+    score хранит log2 суммы весов событий, умноженных на 2 в степени
+    (время события / период полураспада). Такой рейтинг не нужно
+    пересчитывать со временем: порядок по score совпадает с порядком
+    по затухшему рейтингу в любой момент.
+    """
+    post_id = models.IntegerField('id поста', primary_key=True)
+    score = models.FloatField('Рейтинг', db_index=True)
+
+
+class ShardSequence(models.Model):
+    """Источник глобально уникальных id постов и комментариев на шардах."""
@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.template.loader import render_to_string
+
+from .models import Follow, Notification, NotificationCounter, User
+
+
+def unread_key(user_id):
+    return f'notifications_unread:{user_id}'
+
+
+def fan_out(post_id, author_id, chunk_size=None):
+    """Раздаёт уведомление о посте всем подписчикам автора.
+
+    Подписчики читаются пачками по id, на каждую пачку приходится
+    один INSERT уведомлений и один UPDATE счётчиков. Задачу можно
+    повторять: уже получившие уведомление подписчики пропускаются, и
+    их счётчики не растут. Возвращает число новых уведомлений.
+    """
+    chunk_size = chunk_size or settings.NOTIFY_CHUNK_SIZE
+    followers = Follow.objects.filter(
+        author_id=author_id).order_by('pk').values_list('pk', 'user_id')
+    last_pk = 0
+    delivered = 0
+    while True:
+        chunk = list(followers.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return delivered
+        last_pk = chunk[-1][0]
+        with transaction.atomic():
+            delivered_before = set(Notification.objects.filter(
+                post_id=post_id,
+                user_id__in=[user_id for _, user_id in chunk]).values_list(
+                'user_id', flat=True))
+            user_ids = [user_id for _, user_id in chunk
+                        if user_id not in delivered_before]
+            if not user_ids:
+                continue
+            Notification.objects.bulk_create(
+                [Notification(user_id=user_id, author_id=author_id,
+                              post_id=post_id)
+                 for user_id in user_ids],
+                ignore_conflicts=True)
+            NotificationCounter.objects.bulk_create(
+                [NotificationCounter(user_id=user_id) for user_id in user_ids],
+                ignore_conflicts=True)
+            NotificationCounter.objects.filter(
+                user_id__in=user_ids).update(unread=F('unread') + 1)
+        cache.delete_many([unread_key(user_id) for user_id in user_ids])
+        delivered += len(user_ids)
+
+
+def unread_count(user):
+    key = unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = NotificationCounter.objects.filter(
+            user=user).values_list('unread', flat=True).first() or 0
+        cache.set(key, count, settings.USER_CACHE_SECONDS)
+    return count
+
+
+def mark_read(user, notification_ids):
+    """Отмечает прочитанными показанные уведомления; счётчик
+    уменьшается на число действительно отмеченных."""
+    with transaction.atomic():
+        read = user.notifications.filter(
+            pk__in=notification_ids, is_read=False).update(is_read=True)
+        if read:
+            NotificationCounter.objects.filter(user=user).update(
+                unread=Greatest(F('unread') - read, 0))
+    cache.delete(unread_key(user.pk))
+
+
+def send_digests(chunk_size=None):
+    """Рассылает письма о непрочитанных уведомлениях, ещё не попавших
+    в дайджест.
+
+    Письма пачки собираются заранее и уходят через одно соединение
+    с почтовым сервером. Возвращает число отправленных писем.
+    """
+    chunk_size = chunk_size or settings.NOTIFY_CHUNK_SIZE
+    pending = Notification.objects.filter(is_read=False, is_emailed=False)
+    recipients = User.objects.filter(
+        pk__in=pending.values('user_id')).exclude(
+        email='').order_by('pk')
+    sent = 0
+    last_pk = 0
+    connection = get_connection()
+    while True:
+        users = list(recipients.filter(pk__gt=last_pk)[:chunk_size])
+        if not users:
+            return sent
+        last_pk = users[-1].pk
+        by_user = {}
+        notifications = list(pending.filter(
+            user__in=users).select_related('author'))
+        for notification in notifications:
+            by_user.setdefault(notification.user_id, []).append(notification)
+        messages = [
+            EmailMessage(
+                'Новые посты в Yatube',
+                render_to_string('posts/digest_email.txt', {
+                    'user': user,
+                    'notifications': by_user[user.pk],
+                    'site_url': settings.SITE_URL,
+                }),
+                to=[user.email])
+            for user in users if user.pk in by_user
+        ]
+        sent += connection.send_messages(messages) or 0
+        Notification.objects.filter(
+            pk__in=[notification.pk for notification in notifications]
+        ).update(is_emailed=True)
@@ -0,0 +1,101 @@
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import Reaction, ReactionCounter
+from .sharding import db_for_post
+
+
+def counts_key(post_id):
+    return f'reactions:{post_id}'
+
+
+def user_key(user_id, post_id):
+    return f'reactions:{post_id}:user:{user_id}'
+
+
+def add_to_counter(post_id, kind, delta, using):
+    """Меняет случайную часть счётчика; строка создаётся при первой
+    записи в неё."""
+    counters = ReactionCounter.objects.using(using)
+    shard = random.randrange(settings.REACTION_COUNTER_SHARDS)
+    updated = counters.filter(
+        post_id=post_id, kind=kind, shard=shard).update(
+        count=F('count') + delta)
+    if not updated:
+        counters.bulk_create(
+            [ReactionCounter(post_id=post_id, kind=kind, shard=shard)],
+            ignore_conflicts=True)
+        counters.filter(post_id=post_id, kind=kind, shard=shard).update(
+            count=F('count') + delta)
+
+
+def react(user, post_id, kind):
+    """Ставит реакцию; возвращает False, если она уже стояла."""
+    using = db_for_post(post_id)
+    try:
+        with transaction.atomic(using=using):
+            Reaction.objects.using(using).create(
+                post_id=post_id, user=user, kind=kind)
+            add_to_counter(post_id, kind, 1, using)
+    except IntegrityError:
+        return False
+    cache.delete_many([counts_key(post_id), user_key(user.pk, post_id)])
+    return True
+
+
+def unreact(user, post_id, kind):
+    using = db_for_post(post_id)
+    with transaction.atomic(using=using):
+        deleted, _ = Reaction.objects.using(using).filter(
+            post_id=post_id, user=user, kind=kind).delete()
+        if deleted:
+            add_to_counter(post_id, kind, -1, using)
+    cache.delete_many([counts_key(post_id), user_key(user.pk, post_id)])
+    return bool(deleted)
+
+
+def remove_posts(post_ids, using):
+    """Удаляет реакции и счётчики удалённых постов."""
+    reactions = Reaction.objects.using(using).filter(post_id__in=post_ids)
+    with transaction.atomic(using=using):
+        keys = [user_key(user_id, post_id) for user_id, post_id
+                in reactions.values_list('user_id', 'post_id')]
+        reactions.delete()
+        ReactionCounter.objects.using(using).filter(
+            post_id__in=post_ids).delete()
+    cache.delete_many(
+        [*keys, *(counts_key(post_id) for post_id in post_ids)])
+
+
+def toggle(user, post_id, kind):
+    return react(user, post_id, kind) or not unreact(user, post_id, kind)
+
+
+def counts(post_id):
+    """Реакции поста {kind: число}: сумма частей счётчика, из кэша."""
+    key = counts_key(post_id)
+    result = cache.get(key)
+    if result is None:
+        result = dict(ReactionCounter.objects.using(
+            db_for_post(post_id)).filter(post_id=post_id).values(
+            'kind').annotate(total=Sum('count')).values_list(
+            'kind', 'total'))
+        cache.set(key, result)
+    return result
+
+
+def user_reactions(user, post_id):
+    """Реакции пользователя на пост, из кэша."""
+    if not user.is_authenticated:
+        return set()
+    key = user_key(user.pk, post_id)
+    result = cache.get(key)
+    if result is None:
+        result = set(Reaction.objects.using(db_for_post(post_id)).filter(
+            post_id=post_id, user=user).values_list('kind', flat=True))
+        cache.set(key, result)
+    return result
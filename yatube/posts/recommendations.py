@@ -0,0 +1,119 @@
+import math
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Follow, GroupFollow, Post
+from .sharding import is_sharded
+
+FRIENDS_WEIGHT = 3
+GROUPS_WEIGHT = 2
+ACTIVITY_WEIGHT = 1
+ACTIVITY_DAYS = 7
+# Сколько промахи ждут уже поставленного пересчёта, не ставя новый.
+PENDING_SECONDS = 60
+
+
+def recommendations_key(user_id):
+    return f'recommendations:{user_id}'
+
+
+def pending_key(user_id):
+    return f'recommendations:{user_id}:pending'
+
+
+def recent_activity(author_ids=None, limit=None):
+    """Число постов авторов за последние ACTIVITY_DAYS дней.
+
+    Один GROUP BY на шард; без author_ids - самые активные авторы.
+    """
+    since = timezone.now() - timedelta(days=ACTIVITY_DAYS)
+
+    def build(posts):
+        posts = posts.filter(pub_date__gte=since)
+        if author_ids is not None:
+            posts = posts.filter(author_id__in=author_ids)
+        posts = posts.order_by().values('author_id').annotate(
+            posts=Count('id')).order_by('-posts')
+        return posts[:limit] if limit else posts
+
+    activity = Counter()
+    if is_sharded():
+        querysets = [build(Post.objects.using(alias))
+                     for alias in settings.POST_SHARDS]
+    else:
+        querysets = [build(Post.objects.all())]
+    for queryset in querysets:
+        for row in queryset:
+            activity[row['author_id']] += row['posts']
+    return activity
+
+
+def compute(user_id, limit=None):
+    """Кандидаты в подписки [(author_id, score), ...] по убыванию score.
+
+    Очки складываются из числа подписок пользователя, которые читают
+    кандидата, числа общих групп и недавней активности кандидата.
+    Каждая составляющая считается одним агрегирующим запросом.
+    """
+    limit = limit or settings.RECOMMENDATIONS_SIZE
+    pool = limit * 10
+    followees = Follow.objects.filter(user_id=user_id).values('author_id')
+    excluded = {user_id, *followees.values_list('author_id', flat=True)}
+    scores = Counter()
+    friends = Follow.objects.filter(user_id__in=followees).exclude(
+        author_id__in=followees).exclude(author_id=user_id).values(
+        'author_id').annotate(common=Count('id')).order_by('-common')
+    for row in friends[:pool]:
+        scores[row['author_id']] += FRIENDS_WEIGHT * row['common']
+    groups = GroupFollow.objects.filter(user_id=user_id).values('group_id')
+    neighbours = GroupFollow.objects.filter(group_id__in=groups).exclude(
+        user_id=user_id).values('user_id').annotate(
+        common=Count('id')).order_by('-common')
+    for row in neighbours[:pool]:
+        if row['user_id'] not in excluded:
+            scores[row['user_id']] += GROUPS_WEIGHT * row['common']
+    activity = (recent_activity(list(scores)) if scores
+                else recent_activity(limit=pool))
+    for author_id, posts in activity.items():
+        if author_id not in excluded:
+            scores[author_id] += ACTIVITY_WEIGHT * math.log2(1 + posts)
+    return scores.most_common(limit)
+
+
+def for_user(user):
+    """Готовые рекомендации из кэша.
+
+    При промахе запрос не ждёт пересчёта: возвращается пустой список,
+    а список считает фоновая задача. Пока она не выполнилась, следующие
+    промахи не трогают очередь.
+    """
+    from .tasks import queue_recommendations
+
+    result = cache.get(recommendations_key(user.pk))
+    if result is None:
+        if cache.add(pending_key(user.pk), True, PENDING_SECONDS):
+            queue_recommendations(user.pk)
+        return []
+    return result
+
+
+def refresh(user_id):
+    cache.set(recommendations_key(user_id), compute(user_id),
+              settings.RECOMMENDATIONS_SECONDS)
+    cache.delete(pending_key(user_id))
+
+
+def forget(user_id, author_id):
+    """Убирает из готового списка автора, на которого только что
+    подписались; полный пересчёт делает фоновая задача."""
+    key = recommendations_key(user_id)
+    result = cache.get(key)
+    if result is not None:
+        cache.set(key, [(candidate, score) for candidate, score in result
+                        if candidate != author_id],
+                  settings.RECOMMENDATIONS_SECONDS)
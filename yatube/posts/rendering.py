@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.utils.text import Truncator
+
+from . import markup
+from .models import ArchivedPost, Post
+
+EXCERPT_LENGTH = Post._meta.get_field('excerpt').max_length
+
+CARD_DEFERRED = ('text', 'text_html')
+
+
+def make_excerpt(html):
+    """Начало текста без разметки одной строкой, не длиннее
+    EXCERPT_LENGTH."""
+    return Truncator(markup.to_plain(html)).chars(EXCERPT_LENGTH)
+
+
+def render_post(post):
+    post.text_html = markup.render(post.text)
+    post.excerpt = make_excerpt(post.text_html)
+
+
+def for_cards(posts):
+    """Выборка для карточек ленты: без полного текста и его HTML."""
+    return posts.defer(*CARD_DEFERRED)
+
+
+def backfill(chunk_size=500):
+    """Заполняет text_html и excerpt активных и архивных постов
+    пачками по id, по одному UPDATE на пачку."""
+    rendered = 0
+    for alias in settings.POST_SHARDS:
+        for model in (Post, ArchivedPost):
+            posts = model.objects.using(alias).order_by('pk').only('text')
+            last_pk = 0
+            while True:
+                chunk = list(posts.filter(pk__gt=last_pk)[:chunk_size])
+                if not chunk:
+                    break
+                for post in chunk:
+                    render_post(post)
+                model.objects.using(alias).bulk_update(
+                    chunk, ['text_html', 'excerpt'])
+                last_pk = chunk[-1].pk
+                rendered += len(chunk)
+    return rendered
@@ -0,0 +1,198 @@
+import copy
+import heapq
+from collections import defaultdict
+from itertools import islice
+from operator import attrgetter
+
+from django.conf import settings
+
+from .models import (ArchivedComment, ArchivedPost, Comment, Mention, Post,
+                     PostTag, Reaction, ReactionCounter, ShardSequence, User)
+
+# Модели, чьи строки лежат на шарде поста, но ссылаются на него по id.
+POST_ID_MODELS = (PostTag, Mention, Reaction, ReactionCounter)
+
+SHARDED_MODELS = (Post, Comment, ArchivedPost, ArchivedComment,
+                  *POST_ID_MODELS)
+
+# Порядок ленты: pk различает посты с одинаковой pub_date, иначе
+# слияние шардов ставило бы их по-разному и страницы повторялись бы.
+FEED_ORDER = ('-pub_date', '-pk')
+
+
+def is_sharded():
+    return len(settings.POST_SHARDS) > 1
+
+
+def bucket_for(object_id):
+    return object_id % settings.POST_SHARD_BUCKETS
+
+
+def shard_for_bucket(bucket):
+    """Карта шардов: виртуальные корзины по кругу раскладываются по базам.
+
+    Корзин заметно больше, чем баз, поэтому при добавлении шарда
+    переносятся целые корзины, а не пересчитывается каждый автор.
+    """
+    shards = settings.POST_SHARDS
+    return shards[bucket % len(shards)]
+
+
+def shard_for_author(author_id):
+    return shard_for_bucket(bucket_for(author_id))
+
+
+def shard_for_post(post_id):
+    """Шард поста по его id: корзина автора зашита в младшие разряды."""
+    return shard_for_bucket(bucket_for(int(post_id)))
+
+
+def post_author_id(obj):
+    """Автор поста, по которому шардируется пост или комментарий."""
+    return obj.author_id if isinstance(obj, Post) else obj.post.author_id
+
+
+def next_id(author_id):
+    """Глобально уникальный id для поста или комментария автора."""
+    sequence = ShardSequence.objects.create()
+    return (sequence.pk * settings.POST_SHARD_BUCKETS
+            + bucket_for(author_id))
+
+
+def replicate(instance):
+    """Копирует пользователя или группу на все шарды.
+
+    Справочные таблицы нужны на шардах, чтобы работали внешние ключи
+    и select_related('author', 'group').
+    """
+    for alias in settings.POST_SHARDS[1:]:
+        replica = copy.copy(instance)
+        replica._state = copy.copy(instance._state)
+        replica.save_base(using=alias, raw=True)
+
+
+def remove_replicas(instance):
+    for alias in settings.POST_SHARDS[1:]:
+        type(instance)._base_manager.using(alias).filter(
+            pk=instance.pk).delete()
+
+
+def shard_for_instance(model, instance):
+    """Шард для модели по подсказке роутера или None, если он неизвестен."""
+    if isinstance(instance, (Comment, ArchivedComment)):
+        if not instance._state.adding:
+            return instance._state.db
+        instance = instance.post
+    if isinstance(instance, (Post, ArchivedPost)):
+        return shard_for_author(instance.author_id)
+    if isinstance(instance, POST_ID_MODELS):
+        return shard_for_post(instance.post_id)
+    if model in (Post, ArchivedPost) and isinstance(instance, User):
+        return shard_for_author(instance.pk)
+    return None
+
+
+def db_for_post(post_id):
+    """База для записи строк, относящихся к посту с этим id."""
+    return shard_for_post(post_id) if is_sharded() else 'default'
+
+
+def posts_for_id(post_id, model=Post):
+    """Выборка постов на шарде, где лежит пост с этим id."""
+    if not is_sharded():
+        return model.objects.all()
+    return model.objects.using(shard_for_post(post_id))
+
+
+def posts_by_ids(post_ids, model=Post, build=None):
+    """Словарь постов по id: по одному запросу на каждый нужный шард."""
+    build = build or (lambda queryset: queryset)
+    if not is_sharded():
+        return build(model.objects.all()).in_bulk(post_ids)
+    by_shard = defaultdict(list)
+    for post_id in post_ids:
+        by_shard[shard_for_post(post_id)].append(post_id)
+    posts = {}
+    for alias, ids in by_shard.items():
+        posts.update(build(model.objects.using(alias)).in_bulk(ids))
+    return posts
+
+
+def distinct_values(model, field, build):
+    """Различные значения поля со всех шардов одним множеством."""
+    aliases = settings.POST_SHARDS if is_sharded() else [None]
+    return {
+        value for alias in aliases
+        for value in build(model.objects.using(alias)).values_list(
+            field, flat=True).distinct()}
+
+
+def scatter(model, build=None):
+    """Собирает одну и ту же выборку со всех шардов.
+
+    build получает менеджер модели на шарде и возвращает выборку, которая
+    затем сортируется по FEED_ORDER. Без шардирования возвращается
+    обычный QuerySet.
+    """
+    build = build or (lambda queryset: queryset)
+    if not is_sharded():
+        return build(model.objects.all()).order_by(*FEED_ORDER)
+    return ShardedQuerySet(
+        [build(model.objects.using(alias)).order_by(*FEED_ORDER)
+         for alias in settings.POST_SHARDS])
+
+
+class ShardedQuerySet:
+    """Отсортированные выборки с нескольких шардов как одна выборка.
+
+    Поддерживает count() и срезы, поэтому её можно отдать Paginator.
+    Для страницы каждый шард возвращает не больше stop строк, а затем
+    отсортированные куски сливаются кучей.
+    """
+    ordered = True
+
+    def __init__(self, querysets, key=attrgetter('pub_date', 'pk')):
+        self.querysets = querysets
+        self.key = key
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return heapq.merge(*self.querysets, key=self.key, reverse=True)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        parts = (self.querysets if stop is None
+                 else [queryset[:stop] for queryset in self.querysets])
+        merged = heapq.merge(*parts, key=self.key, reverse=True)
+        return list(islice(merged, start, stop))
+
+
+class ShardRouter:
+    """Посты и комментарии живут на шарде автора поста."""
+
+    def db_for_read(self, model, **hints):
+        if not is_sharded() or model not in SHARDED_MODELS:
+            return None
+        return shard_for_instance(model, hints.get('instance'))
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not is_sharded():
+            return None
+        databases = set(settings.POST_SHARDS)
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.POST_SHARDS[1:]:
+            return model_name != 'shardsequence'
+        return None
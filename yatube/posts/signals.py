@@ -0,0 +1,129 @@
+from collections import defaultdict
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (graph, images, lookups, reactions, rendering, sharding,
+               surrogate, tags)
+from .models import ArchivedPost, Comment, Follow, Group, Post, User
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def assign_sharded_id(sender, instance, raw, **kwargs):
+    """Выдаёт новым постам и комментариям id с корзиной автора поста."""
+    if raw or instance.pk is not None or not sharding.is_sharded():
+        return
+    instance.pk = sharding.next_id(sharding.post_author_id(instance))
+
+
+@receiver(pre_save, sender=Post)
+def render_text(sender, instance, **kwargs):
+    rendering.render_post(instance)
+
+
+@receiver(pre_save, sender=Post)
+def analyze_image(sender, instance, raw, **kwargs):
+    if not raw:
+        images.fill_metadata(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_tags(sender, instance, raw, using, **kwargs):
+    if not raw:
+        tags.index_posts([instance], using)
+
+
+def moved_to_archive(sender, instance, using):
+    return sender is Post and ArchivedPost.objects.using(using).filter(
+        pk=instance.pk).exists()
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def remove_tags(sender, instance, using, **kwargs):
+    if moved_to_archive(sender, instance, using):
+        # Пост перенесён в архив, теги остаются за архивной копией.
+        return
+    tags.remove_posts([instance.pk], using)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def remove_reactions(sender, instance, using, **kwargs):
+    if moved_to_archive(sender, instance, using):
+        return
+    reactions.remove_posts([instance.pk], using)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_graph(sender, instance, **kwargs):
+    """Массовые записи сигналов не шлют и сбрасывают граф сами."""
+    graph.invalidate([instance.user_id], [instance.author_id])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+def replicate_to_shards(sender, instance, using, **kwargs):
+    if using == 'default' and sharding.is_sharded():
+        sharding.replicate(instance)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def remove_from_shards(sender, instance, using, **kwargs):
+    if using == 'default' and sharding.is_sharded():
+        sharding.remove_replicas(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_lookup(sender, instance, **kwargs):
+    lookups.users.invalidate(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_lookup(sender, instance, **kwargs):
+    lookups.groups.invalidate(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post(sender, instance, using, **kwargs):
+    surrogate.purge_on_commit(surrogate.changed_post_keys(instance), using)
+
+
+def comments_changed(comments):
+    """Последствия записи или удаления комментариев.
+
+    Общие для save() и для пачек из буфера записи, которые идут через
+    bulk_create и сигналов не посылают.
+    """
+    keys = defaultdict(set)
+    for comment in comments:
+        keys[sharding.db_for_post(comment.post_id)].add(
+            surrogate.post_key(comment.post_id))
+    for using, post_keys in keys.items():
+        surrogate.purge_on_commit(post_keys, using)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    comments_changed([instance])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def purge_author(sender, instance, using, update_fields=None, **kwargs):
+    if update_fields == {'last_login'}:
+        return
+    surrogate.purge_on_commit([surrogate.author_key(instance.pk)], using)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def purge_group(sender, instance, using, **kwargs):
+    surrogate.purge_on_commit([surrogate.group_key(instance.pk)], using)
@@ -0,0 +1,56 @@
+from django.db import transaction
+
+from core.purge import dispatcher, expire
+
+from .tags import extract_mentions, extract_tags
+
+INDEX_KEY = 'index'
+TRENDING_KEY = 'trending'
+
+
+def post_key(post_id):
+    return f'post-{post_id}'
+
+
+def author_key(author_id):
+    return f'author-{author_id}'
+
+
+def group_key(group_id):
+    return f'group-{group_id}'
+
+
+def tag_key(name):
+    return f'tag-{name.lower()}'
+
+
+def mentions_key(username):
+    return f'mentions-{username}'
+
+
+def page_keys(posts):
+    """Ключи всех постов страницы: правка любого из них сбрасывает её."""
+    return [post_key(post.pk) for post in posts]
+
+
+def post_detail_keys(post):
+    keys = [post_key(post.pk), author_key(post.author_id)]
+    if post.group_id:
+        keys.append(group_key(post.group_id))
+    return keys
+
+
+def changed_post_keys(post):
+    """Страницы, на которых появляется или меняется пост: его собственная,
+    лента автора, группы, тегов, упоминаний и главная."""
+    return [*post_detail_keys(post), INDEX_KEY,
+            *map(tag_key, extract_tags(post.text)),
+            *map(mentions_key, extract_mentions(post.text))]
+
+
+def purge_on_commit(keys, using=None):
+    """Сбрасывает локальные кэши страниц сразу, а прокси - после фиксации
+    транзакции, чтобы он не успел закэшировать старую версию заново."""
+    keys = list(keys)
+    expire(keys)
+    transaction.on_commit(lambda: dispatcher.purge(keys), using=using)
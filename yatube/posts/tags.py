@@ -0,0 +1,73 @@
+import re
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import ArchivedPost, Mention, Post, PostTag, User
+
+TAG_RE = re.compile(r'(?<![\w&])#(\w{1,100})')
+MENTION_RE = re.compile(r'(?<![\w.])@([\w.+-]*\w)')
+
+
+def extract_tags(text):
+    return {name.lower() for name in TAG_RE.findall(text)}
+
+
+def extract_mentions(text):
+    return set(MENTION_RE.findall(text))
+
+
+def index_posts(posts, using):
+    """Перестраивает теги и упоминания для пачки постов одного шарда.
+
+    На всю пачку уходит по одному DELETE и INSERT на каждую таблицу
+    и один запрос за упомянутыми пользователями.
+    """
+    post_ids = [post.pk for post in posts]
+    mentions = {post.pk: extract_mentions(post.text) for post in posts}
+    usernames = set().union(*mentions.values())
+    users = dict(User.objects.filter(
+        username__in=usernames).values_list('username', 'pk'))
+    with transaction.atomic(using=using):
+        PostTag.objects.using(using).filter(post_id__in=post_ids).delete()
+        Mention.objects.using(using).filter(post_id__in=post_ids).delete()
+        PostTag.objects.using(using).bulk_create(
+            PostTag(post_id=post.pk, name=name)
+            for post in posts for name in extract_tags(post.text))
+        Mention.objects.using(using).bulk_create(
+            Mention(post_id=post_id, user_id=users[username])
+            for post_id, names in mentions.items()
+            for username in names if username in users)
+
+
+def remove_posts(post_ids, using):
+    """Удаляет теги и упоминания удалённых постов."""
+    with transaction.atomic(using=using):
+        PostTag.objects.using(using).filter(post_id__in=post_ids).delete()
+        Mention.objects.using(using).filter(post_id__in=post_ids).delete()
+
+
+def backfill(chunk_size=500):
+    """Индексирует все активные и архивные посты пачками по id."""
+    indexed = 0
+    for alias in settings.POST_SHARDS:
+        for model in (Post, ArchivedPost):
+            posts = model.objects.using(alias).order_by('pk').only('text')
+            last_pk = 0
+            while True:
+                chunk = list(posts.filter(pk__gt=last_pk)[:chunk_size])
+                if not chunk:
+                    break
+                index_posts(chunk, alias)
+                last_pk = chunk[-1].pk
+                indexed += len(chunk)
+    return indexed
+
+
+def tagged(name):
+    """id постов с тегом; подзапрос выполняется на шарде самой выборки."""
+    return PostTag.objects.filter(name=name.lower()).values('post_id')
+
+
+def mentioning(user):
+    return Mention.objects.filter(user=user).values('post_id')
@@ -0,0 +1,57 @@
+from sorl.thumbnail import get_thumbnail
+
+from jobs.queue import enqueue, task
+
+from . import recommendations, trending
+from .notifications import fan_out
+from .sharding import posts_for_id
+
+
+@task('posts.make_thumbnail')
+def make_thumbnail(post_id):
+    """Готовит превью заранее, чтобы шаблон взял его из кэша sorl."""
+    post = posts_for_id(post_id).filter(pk=post_id).first()
+    if post is not None and post.image:
+        # Параметры совпадают с тегами thumbnail в
+        # posts/includes/post_image.html: карточка и страница поста.
+        get_thumbnail(post.image, '960x339', crop='center', upscale=True)
+        if post.image_width:
+            get_thumbnail(post.image, '960', upscale=False)
+
+
+def queue_thumbnail(post):
+    if post.image:
+        enqueue('posts.make_thumbnail', post_id=post.pk,
+                dedup_key=f'thumbnail:{post.pk}')
+
+
+@task('posts.notify_followers')
+def notify_followers(post_id, author_id):
+    fan_out(post_id, author_id)
+
+
+def queue_notifications(post):
+    enqueue('posts.notify_followers', post_id=post.pk,
+            author_id=post.author_id, dedup_key=f'notify:{post.pk}')
+
+
+@task('posts.refresh_recommendations')
+def refresh_recommendations(user_id):
+    recommendations.refresh(user_id)
+
+
+def queue_recommendations(user_id):
+    enqueue('posts.refresh_recommendations', user_id=user_id,
+            dedup_key=f'recommendations:{user_id}')
+
+
+@task('posts.bump_trending')
+def bump_trending(weights):
+    for post_id, weight in weights:
+        trending.bump(post_id, weight)
+
+
+def queue_trending(weights):
+    """Передаёт воркеру веса {post_id: вес} для рейтинга популярного."""
+    if weights:
+        enqueue('posts.bump_trending', weights=list(weights.items()))
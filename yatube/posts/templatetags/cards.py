@@ -0,0 +1,10 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def author_ids(posts):
+    """id авторов постов страницы через запятую."""
+    return ','.join(str(author_id) for author_id in sorted(
+        {post.author_id for post in posts}))
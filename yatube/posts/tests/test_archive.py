@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_posts
+from ..models import ArchivedComment, ArchivedPost, Comment, Post, User
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.client = Client()
+        self.client.force_login(self.user)
+        for number in range(12):
+            post = Post.objects.create(
+                author=self.user, text=f'Тестовый пост {number}')
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.now() - timedelta(days=30 - number))
+        self.old_post = Post.objects.last()
+        Comment.objects.create(
+            post=self.old_post, author=self.user, text='Комментарий')
+        cache.clear()
+
+    def test_archive_moves_old_posts_with_comments(self):
+        """Старые посты и их комментарии переезжают в архив пачками."""
+        archived = archive_posts(
+            timezone.now() - timedelta(days=24, hours=12), batch_size=4)
+        self.assertEqual(archived, 6)
+        self.assertEqual(Post.objects.count(), 6)
+        self.assertEqual(ArchivedPost.objects.count(), 6)
+        self.assertFalse(Comment.objects.exists())
+        archived_post = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertEqual(archived_post.text, self.old_post.text)
+        self.assertEqual(ArchivedComment.objects.get().post, archived_post)
+
+    def test_archived_post_is_readable(self):
+        """Страница архивного поста доступна, но без формы комментария."""
+        archive_posts(timezone.now() - timedelta(days=24, hours=12))
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.old_post.pk,)))
+        self.assertEqual(response.context['post'].pk, self.old_post.pk)
+        self.assertContains(response, 'Комментарий')
+        self.assertNotContains(response, 'Добавить комментарий')
+
+    def test_feeds_read_through_to_archive(self):
+        """Глубокие страницы лент продолжаются архивными постами."""
+        expected = [post.pk for post in Post.objects.all()]
+        archive_posts(timezone.now() - timedelta(days=24, hours=12))
+        for url in (reverse('posts:index'),
+                    reverse('posts:profile', args=(self.user.username,))):
+            with self.subTest(url=url):
+                pages = [self.client.get(url, {'page': page}).context[
+                    'page_obj'] for page in (1, 2)]
+                self.assertEqual(pages[0].paginator.count, 12)
+                self.assertEqual(
+                    [post.pk for page in pages for post in page], expected)
@@ -0,0 +1,102 @@
+import signal
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.buffers import drain, handle_sigterm
+from jobs.queue import run_pending
+
+from .. import buffers, trending
+from ..models import Comment, Follow, Post, User
+
+
+@override_settings(WRITE_BEHIND_ENABLED=True, WRITE_BEHIND_FLUSH_MS=0,
+                   WRITE_BEHIND_MAX_ITEMS=3, JOBS_EAGER=False)
+class WriteBehindTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.follower)
+
+    def tearDown(self):
+        buffers.comments.flush()
+        buffers.follows.flush()
+        trending.scores.flush()
+
+    def test_comment_is_visible_before_flush(self):
+        """Комментарий виден сразу, а в базу попадает при сбросе."""
+        self.client.post(reverse('posts:add_comment', args=(self.post.pk,)),
+                         {'text': 'Комментарий'})
+        self.assertFalse(Comment.objects.exists())
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.pk,)))
+        self.assertContains(response, 'Комментарий')
+        created = buffers.comments.for_post(self.post.pk)[0].created
+        buffers.comments.flush()
+        comment = Comment.objects.get()
+        self.assertEqual(comment.author, self.follower)
+        self.assertEqual(comment.created, created)
+
+    def test_comment_is_visible_on_cached_page(self):
+        """Страница поста из кэша показывает комментарий до сброса."""
+        detail_url = reverse('posts:post_detail', args=(self.post.pk,))
+        self.client.get(detail_url)
+        response = self.client.post(
+            reverse('posts:add_comment', args=(self.post.pk,)),
+            {'text': 'Свежий комментарий'}, follow=True)
+        self.assertFalse(Comment.objects.exists())
+        self.assertContains(response, 'Свежий комментарий')
+
+    def test_buffer_flushes_when_full(self):
+        """Набрав WRITE_BEHIND_MAX_ITEMS записей, буфер сбрасывается."""
+        for number in range(3):
+            self.client.post(
+                reverse('posts:add_comment', args=(self.post.pk,)),
+                {'text': f'Комментарий {number}'})
+        self.assertEqual(Comment.objects.count(), 3)
+        self.assertFalse(buffers.comments.pending())
+
+    def test_follow_actions_are_coalesced(self):
+        """Подписка видна до сброса, а подписка с отпиской схлопываются."""
+        follow_url = reverse('posts:profile_follow', args=('author',))
+        self.client.post(follow_url)
+        response = self.client.get(reverse('posts:profile', args=('author',)))
+        self.assertTrue(response.context['following'])
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertContains(response, self.post)
+        self.client.post(reverse('posts:profile_unfollow', args=('author',)))
+        buffers.follows.flush()
+        self.assertFalse(Follow.objects.exists())
+        self.client.post(follow_url)
+        self.client.post(follow_url)
+        buffers.follows.flush()
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_unflushed_comments_survive_shutdown(self):
+        """Если при остановке база недоступна, комментарий дописывает
+        очередь задач."""
+        self.client.post(reverse('posts:add_comment', args=(self.post.pk,)),
+                         {'text': 'Комментарий'})
+        with mock.patch.object(buffers.CommentBuffer, 'write',
+                               side_effect=DatabaseError):
+            drain()
+        self.assertFalse(buffers.comments.pending())
+        self.assertFalse(Comment.objects.exists())
+        run_pending()
+        self.assertEqual(Comment.objects.get().author, self.follower)
+
+    def test_sigterm_drains_buffers(self):
+        """SIGTERM сбрасывает буферы и передаётся прежнему обработчику."""
+        self.client.post(reverse('posts:add_comment', args=(self.post.pk,)),
+                         {'text': 'Комментарий'})
+        previous = mock.Mock()
+        handle_sigterm(previous)(signal.SIGTERM, None)
+        previous.assert_called_once_with(signal.SIGTERM, None)
+        self.assertTrue(Comment.objects.exists())
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_posts
+from ..feeds import merged_feed
+from ..models import Follow, Group, GroupFollow, Post, User
+
+
+@override_settings(POSTS_ON_PAGE=2)
+class PersonalFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='author')
+        stranger = User.objects.create_user(username='stranger')
+        self.group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание')
+        Follow.objects.create(user=self.reader, author=author)
+        GroupFollow.objects.create(user=self.reader, group=self.group)
+        posts = [
+            Post.objects.create(author=author, text='Автор'),
+            Post.objects.create(author=stranger, text='Чужой'),
+            Post.objects.create(author=stranger, group=self.group,
+                                text='Группа'),
+            Post.objects.create(author=author, group=self.group,
+                                text='Автор в группе'),
+            Post.objects.create(author=author, text='Ещё автор'),
+        ]
+        for age, post in enumerate(reversed(posts)):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.now() - timedelta(days=age))
+        self.expected = [posts[4].pk, posts[3].pk, posts[2].pk, posts[0].pk]
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def read_feed(self):
+        pages, cursor = [], None
+        while True:
+            params = {'after': cursor} if cursor else {}
+            page = self.client.get(
+                reverse('posts:personal_feed'), params).context['page_obj']
+            pages.append([post.pk for post in page])
+            if not page.has_next():
+                return pages
+            cursor = page.next_cursor
+
+    def test_feed_merges_authors_and_groups(self):
+        """Лента сливает авторов и группы без повторов по курсору."""
+        self.assertEqual(self.read_feed(),
+                         [self.expected[:2], self.expected[2:]])
+
+    def test_feed_reads_through_to_archive(self):
+        """Лента продолжается архивными постами."""
+        archive_posts(timezone.now() - timedelta(days=2, hours=12))
+        self.assertEqual(sum(self.read_feed(), []), self.expected)
+
+    def test_page_cost_is_bounded(self):
+        """Страница - один запрос на источник, сколько бы ни было подписок."""
+        groups = [self.group.pk, *range(1000, 1300)]
+        with self.assertNumQueries(2):
+            page = merged_feed([
+                lambda posts: posts.filter(author__username='author'),
+                lambda posts: posts.filter(group_id__in=groups),
+            ])
+        self.assertEqual([post.pk for post in page], self.expected[:2])
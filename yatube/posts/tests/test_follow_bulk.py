@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import buffers, graph
+from ..models import Follow, Group, Post, User
+
+
+@override_settings(FOLLOW_CHUNK_SIZE=2)
+class FollowWriteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader')
+        self.authors = [User.objects.create_user(username=f'author{number}')
+                        for number in range(5)]
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_follow_and_unfollow_are_idempotent(self):
+        """Подписка - один INSERT, отписка - один DELETE; повторы не дают
+        ошибок."""
+        author = self.authors[0]
+        for following, queries in ((True, 1), (True, 1), (False, 1),
+                                   (False, 1)):
+            with self.subTest(following=following):
+                with self.assertNumQueries(queries):
+                    buffers.set_following(self.user, author, following)
+                self.assertEqual(graph.follows(self.user.pk, author.pk),
+                                 following)
+                self.assertEqual(graph.follower_count(author.pk),
+                                 int(following))
+
+    def test_follow_many_skips_existing(self):
+        """Массовая подписка пропускает существующие связи и себя."""
+        graph.follower_count(self.authors[0].pk)
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        author_ids = [author.pk for author in self.authors]
+        created = buffers.follow_many(self.user, [*author_ids, self.user.pk])
+        self.assertEqual(created, 4)
+        self.assertEqual(set(graph.followees(self.user.pk)), set(author_ids))
+        self.assertEqual(graph.follower_count(self.authors[0].pk), 1)
+
+    def test_other_writes_invalidate_graph(self):
+        """Граф сбрасывается и при записи мимо set_following."""
+        author = self.authors[0]
+        self.assertFalse(graph.follows(self.user.pk, author.pk))
+        Follow.objects.create(user=self.user, author=author)
+        self.assertTrue(graph.follows(self.user.pk, author.pk))
+        self.assertEqual(graph.follower_count(author.pk), 1)
+        self.user.delete()
+        self.assertEqual(graph.follower_count(author.pk), 0)
+
+    def test_bulk_endpoints(self):
+        """Подписка на авторов группы и импорт списка имён."""
+        group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание')
+        for author in self.authors[:2]:
+            Post.objects.create(author=author, group=group, text='Пост')
+        self.client.post(
+            reverse('posts:group_follow_authors', args=(group.slug,)))
+        self.assertEqual(set(graph.followees(self.user.pk)),
+                         {author.pk for author in self.authors[:2]})
+        self.client.post(reverse('posts:follow_import'),
+                         {'usernames': 'author3, author4\nnobody'})
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 4)
@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import graph
+from ..models import Follow, Post, User
+
+
+class FollowGraphTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.authors = [User.objects.create_user(username=f'author{number}')
+                        for number in range(4)]
+        for author in self.authors[1::2]:
+            Follow.objects.create(user=self.reader, author=author)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_checks_need_no_queries(self):
+        """После загрузки массива проверки подписок не ходят в базу."""
+        author_ids = [author.pk for author in self.authors]
+        self.assertEqual(graph.follows_many(self.reader.pk, author_ids),
+                         set(author_ids[1::2]))
+        with self.assertNumQueries(0):
+            self.assertTrue(graph.follows(self.reader.pk, author_ids[1]))
+            self.assertFalse(graph.follows(self.reader.pk, author_ids[0]))
+
+    def test_graph_is_loaded_from_primary(self):
+        """Кэш графа заполняется с основной базы и внутри use_replica."""
+        with mock.patch('core.routers.current_replica',
+                        return_value='stale_replica'):
+            self.assertTrue(
+                graph.follows(self.reader.pk, self.authors[1].pk))
+            self.assertEqual(graph.follower_count(self.authors[1].pk), 1)
+
+    def test_follow_and_unfollow_invalidate(self):
+        """Подписка и отписка сразу видны в графе."""
+        first, second = self.authors[:2]
+        self.client.get(reverse('posts:profile_follow', args=(first,)))
+        self.client.get(reverse('posts:profile_unfollow', args=(second,)))
+        self.assertTrue(graph.follows(self.reader.pk, first.pk))
+        self.assertFalse(graph.follows(self.reader.pk, second.pk))
+
+    def test_feed_cards_show_follow_state(self):
+        """Карточки постов отмечают авторов, на которых подписан читатель."""
+        for author in self.authors:
+            Post.objects.create(author=author, text='Пост')
+        response = self.client.get(reverse('posts:index'))
+        for author in self.authors:
+            with self.subTest(author=author.username):
+                self.assertEqual(
+                    f'.followed-badge[data-author="{author.pk}"]'
+                    in response.content.decode(),
+                    author in self.authors[1::2])
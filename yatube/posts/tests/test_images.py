@@ -0,0 +1,127 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..images import EXIF_ORIENTATION, UNREADABLE_COLOR
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(size=(300, 100), color=(200, 30, 30), orientation=None):
+    buffer = BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[EXIF_ORIENTATION] = orientation
+    Image.new('RGB', size, color).save(buffer, 'JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageMetadataTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='photographer')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_upload_fills_metadata(self):
+        """При загрузке сохраняются размеры, цвет и заглушка, а сам файл
+        записывается целиком."""
+        content = make_image()
+        post = Post.objects.create(
+            author=self.author, text='Фото',
+            image=SimpleUploadedFile('photo.jpg', content, 'image/jpeg'))
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (300, 100))
+        red, green, blue = (int(post.image_color[i:i + 2], 16)
+                            for i in (1, 3, 5))
+        self.assertGreater(red, 180)
+        self.assertLess(max(green, blue), 60)
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/png;base64,'))
+        self.assertLess(len(post.image_placeholder), 300)
+        with post.image.open('rb') as file:
+            self.assertEqual(file.read(), content)
+
+    def test_removing_image_clears_metadata(self):
+        post = Post.objects.create(
+            author=self.author, text='Фото',
+            image=SimpleUploadedFile('photo.jpg', make_image(), 'image/jpeg'))
+        post.image = None
+        post.save()
+        post.refresh_from_db()
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_placeholder, '')
+
+    def test_rotated_photo_stores_displayed_size(self):
+        """Размеры снимка, повёрнутого по EXIF, - как его покажет
+        браузер."""
+        post = Post.objects.create(
+            author=self.author, text='Фото',
+            image=SimpleUploadedFile(
+                'photo.jpg', make_image(orientation=6), 'image/jpeg'))
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (100, 300))
+
+    def test_unreadable_image_is_not_reopened(self):
+        """Нечитаемая картинка помечается и при следующих сохранениях
+        не открывается."""
+        post = Post.objects.create(
+            author=self.author, text='Фото', image='posts/missing.jpg')
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_color, UNREADABLE_COLOR)
+        with mock.patch('posts.images.analyze') as analyze:
+            post.text = 'Новый текст'
+            post.save()
+        analyze.assert_not_called()
+
+    def test_backfill_fills_existing_posts(self):
+        post = Post.objects.create(
+            author=self.author, text='Фото',
+            image=SimpleUploadedFile('photo.jpg', make_image(), 'image/jpeg'))
+        Post.objects.filter(pk=post.pk).update(
+            image_width=None, image_height=None, image_color='',
+            image_placeholder='')
+        missing = Post.objects.create(
+            author=self.author, text='Нет файла', image='posts/missing.jpg')
+        call_command('analyze_images', chunk_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        missing.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (300, 100))
+        self.assertNotEqual(post.image_color, '')
+        self.assertEqual(missing.image_color, UNREADABLE_COLOR)
+
+    def test_card_has_sized_placeholder(self):
+        post = Post.objects.create(
+            author=self.author, text='Фото',
+            image=SimpleUploadedFile('photo.jpg', make_image(), 'image/jpeg'))
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, post.image_placeholder)
+        self.assertContains(response, 'aspect-ratio: 960 / 339')
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_post_page_uses_stored_size(self):
+        """Страница поста показывает картинку в её пропорциях."""
+        post = Post.objects.create(
+            author=self.author, text='Фото',
+            image=SimpleUploadedFile('photo.jpg', make_image(), 'image/jpeg'))
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,)))
+        self.assertContains(response, 'aspect-ratio: 300 / 100')
+        self.assertContains(response, 'width="300" height="100"')
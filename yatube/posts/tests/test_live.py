@@ -0,0 +1,57 @@
+import json
+import time
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import live
+from ..models import Follow, Group, Post, User
+
+
+@override_settings(SSE_TIMEOUT=0)
+class LiveFeedTests(TestCase):
+    def setUp(self):
+        live.broadcaster = live.Broadcaster()
+        self.since = time.time() - 1
+        self.author = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        self.group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание')
+        self.in_group = Post.objects.create(
+            author=self.author, group=self.group, text='В группе')
+        self.elsewhere = Post.objects.create(
+            author=self.other, text='Без группы')
+        self.client = Client()
+
+    def events(self, url):
+        response = self.client.get(url, {'since': self.since})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = ''.join(chunk.decode() for chunk in response.streaming_content)
+        return [event['id']
+                for line in body.splitlines() if line.startswith('data: ')
+                for event in json.loads(line[len('data: '):])]
+
+    def test_feeds_receive_matching_posts(self):
+        """Каждая лента получает только свои новые посты."""
+        user = User.objects.create_user(username='reader')
+        Follow.objects.create(user=user, author=self.author)
+        self.client.force_login(user)
+        cases = {
+            reverse('posts:live_index'): [self.in_group.pk,
+                                          self.elsewhere.pk],
+            reverse('posts:live_group', args=(self.group.slug,)):
+                [self.in_group.pk],
+            reverse('posts:live_follow'): [self.in_group.pk],
+        }
+        for url, expected in cases.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.events(url), expected)
+
+    def test_clients_share_one_poll(self):
+        """Пока не прошёл интервал опроса, клиенты не ходят в базу."""
+        live.broadcaster.wait(self.since, 0)
+        with self.assertNumQueries(0):
+            for __ in range(3):
+                events = live.broadcaster.wait(self.since, 0)
+        self.assertEqual(len(events), 2)
+        self.assertEqual(live.broadcaster.wait(time.time(), 0), [])
@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import lookups
+from ..models import Group, User
+
+
+class ObjectCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание')
+        self.client = Client()
+
+    def test_lookups_are_cached(self):
+        """Повторный поиск по slug и username не ходит в базу."""
+        for object_cache, value, obj in (
+                (lookups.groups, 'test-slug', self.group),
+                (lookups.users, 'author', self.user)):
+            with self.subTest(cache=object_cache.name):
+                self.assertEqual(object_cache.get(value), obj)
+                with self.assertNumQueries(0):
+                    self.assertEqual(object_cache.get(value), obj)
+                self.assertEqual(object_cache.stats(),
+                                 {'hit': 1, 'miss': 1, 'missing': 0})
+
+    def test_cache_is_filled_from_primary(self):
+        """Промах внутри use_replica читает основную базу."""
+        with mock.patch('core.routers.current_replica',
+                        return_value='stale_replica'):
+            self.assertEqual(lookups.users.get('author'), self.user)
+
+    def test_missing_objects_are_cached(self):
+        """404 кэшируется, пока объект с таким именем не появится."""
+        url = reverse('posts:profile', args=('newcomer',))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertIsNone(lookups.users.get('newcomer'))
+        User.objects.create_user(username='newcomer')
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_rename_and_delete_invalidate(self):
+        """После переименования и удаления старые ключи не отдаются."""
+        lookups.groups.get('test-slug')
+        self.group.slug = 'new-slug'
+        self.group.save()
+        self.assertIsNone(lookups.groups.get('test-slug'))
+        self.assertEqual(lookups.groups.get('new-slug').slug, 'new-slug')
+        self.group.delete()
+        self.assertIsNone(lookups.groups.get('new-slug'))
@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..markup import cache_key, render, render_many, sanitize_url
+from ..models import Comment, Post, User
+
+
+class MarkupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_render(self):
+        """Поддерживаемое подмножество Markdown."""
+        cases = {
+            '**жирный** и *курсив*, _тоже_':
+                '<p><strong>жирный</strong> и <em>курсив</em>, '
+                '<em>тоже</em></p>',
+            'см. [сайт](https://ya.ru/?a=1&b=2)':
+                '<p>см. <a href="https://ya.ru/?a=1&amp;b=2" '
+                'rel="nofollow">сайт</a></p>',
+            '`**не жирный**`': '<p><code>**не жирный**</code></p>',
+            '- раз\n- два\n\n> цитата':
+                '<ul><li>раз</li><li>два</li></ul>'
+                '<blockquote>цитата</blockquote>',
+            '```\n<b>\n```': '<pre><code>&lt;b&gt;</code></pre>',
+            'user_name_here 2*3*4': '<p>user_name_here 2*3*4</p>',
+        }
+        for text, html in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(render(text), html)
+
+    def test_sanitizer(self):
+        """HTML автора экранируется, опасные ссылки остаются текстом."""
+        self.assertEqual(
+            render('<script>alert(1)</script>'),
+            '<p>&lt;script&gt;alert(1)&lt;/script&gt;</p>')
+        for url in ('javascript:alert', 'JaVaScRiPt:alert',
+                    'data:text/html,x', '//evil.example',
+                    'java&#115;cript:alert'):
+            with self.subTest(url=url):
+                self.assertIsNone(sanitize_url(url))
+                self.assertEqual(render(f'[x]({url})'), '<p>x</p>')
+        self.assertEqual(
+            render('[x](/a"onclick="b)'),
+            '<p><a href="/a&quot;onclick=&quot;b" rel="nofollow">x</a></p>')
+
+    def test_render_many_uses_cache(self):
+        """Одинаковый текст компилируется один раз."""
+        render_many(['*a*', '*a*'])
+        self.assertEqual(cache.get(cache_key('*a*')), '<p><em>a</em></p>')
+        cache.set(cache_key('*a*'), 'из кэша')
+        self.assertEqual(render_many(['*a*']), ['из кэша'])
+
+    def test_post_and_comments(self):
+        """Пост показывается из сохранённого HTML, комментарии -
+        через кэш; анонс в ленте без разметки."""
+        author = User.objects.create_user(username='author')
+        post = Post.objects.create(author=author, text='**Важно**: [тут](/)')
+        Comment.objects.create(post=post, author=author, text='*да*')
+        self.assertEqual(post.excerpt, 'Важно: тут')
+        client = Client()
+        response = client.get(reverse('posts:post_detail', args=(post.pk,)))
+        self.assertContains(
+            response,
+            '<p><strong>Важно</strong>: '
+            '<a href="/" rel="nofollow">тут</a></p>')
+        self.assertContains(response, '<p><em>да</em></p>')
+        response = client.get(reverse('posts:index'))
+        self.assertContains(response, 'Важно: тут')
+        self.assertNotContains(response, '**')
@@ -0,0 +1,79 @@
+from django.core import mail
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from jobs.queue import run_pending
+
+from ..models import Follow, Notification, NotificationCounter, User
+from ..notifications import fan_out, send_digests, unread_count
+
+
+@override_settings(JOBS_EAGER=False, NOTIFY_CHUNK_SIZE=2)
+class NotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.followers = [
+            User.objects.create_user(
+                username=f'follower{number}',
+                email=f'follower{number}@example.com')
+            for number in range(5)]
+        Follow.objects.bulk_create(
+            Follow(user=user, author=self.author) for user in self.followers)
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_new_post_notifies_followers_in_chunks(self):
+        """Новый пост раздаётся подписчикам фоновой задачей пачками."""
+        self.client.post(reverse('posts:post_create'), {'text': 'Пост'})
+        self.assertFalse(Notification.objects.exists())
+        run_pending()
+        self.assertEqual(Notification.objects.count(), len(self.followers))
+        for user in self.followers:
+            with self.subTest(user=user.username):
+                self.assertEqual(unread_count(user), 1)
+        with self.assertNumQueries(0):
+            unread_count(self.followers[0])
+
+    def test_opening_notifications_marks_them_read(self):
+        """Страница уведомлений показывает новые и обнуляет счётчик."""
+        fan_out(1, self.author.pk)
+        fan_out(2, self.author.pk)
+        reader = self.followers[0]
+        self.client.force_login(reader)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Уведомления (2)')
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertContains(response, 'Новое:', count=2)
+        self.assertEqual(unread_count(reader), 0)
+        self.assertEqual(
+            NotificationCounter.objects.get(user=reader).unread, 0)
+
+    def test_retried_fan_out_delivers_once(self):
+        """Повтор раздачи не дублирует уведомления и счётчики."""
+        self.assertEqual(fan_out(1, self.author.pk), len(self.followers))
+        self.assertEqual(fan_out(1, self.author.pk), 0)
+        self.assertEqual(Notification.objects.count(), len(self.followers))
+        self.assertEqual(unread_count(self.followers[0]), 1)
+
+    def test_only_shown_notifications_are_marked_read(self):
+        """Уведомления с непоказанных страниц остаются новыми."""
+        for post_id in range(1, 4):
+            fan_out(post_id, self.author.pk)
+        reader = self.followers[0]
+        self.client.force_login(reader)
+        with override_settings(POSTS_ON_PAGE=2):
+            self.client.get(reverse('posts:notifications'))
+        self.assertEqual(unread_count(reader), 1)
+        self.assertEqual(
+            reader.notifications.filter(is_read=False).get().post_id, 1)
+
+    def test_digest_is_sent_once(self):
+        """Дайджест уходит каждому один раз и только о непрочитанном."""
+        fan_out(1, self.author.pk)
+        self.assertEqual(send_digests(), len(self.followers))
+        self.assertIn(reverse('posts:post_detail', args=(1,)),
+                      mail.outbox[0].body)
+        self.assertEqual(send_digests(), 0)
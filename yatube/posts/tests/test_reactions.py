@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import reactions
+from ..models import Post, Reaction, ReactionCounter, User
+
+
+@override_settings(REACTION_COUNTER_SHARDS=4)
+class ReactionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.users = [User.objects.create_user(username=f'user{number}')
+                      for number in range(20)]
+
+    def test_counts_are_summed_across_counter_rows(self):
+        """Счётчик разбит на строки, а сумма равна числу реакций."""
+        for user in self.users:
+            self.assertTrue(
+                reactions.react(user, self.post.pk, Reaction.LIKE))
+        self.assertFalse(
+            reactions.react(self.users[0], self.post.pk, Reaction.LIKE))
+        reactions.unreact(self.users[1], self.post.pk, Reaction.LIKE)
+        self.assertGreater(ReactionCounter.objects.count(), 1)
+        self.assertEqual(reactions.counts(self.post.pk), {Reaction.LIKE: 19})
+        with self.assertNumQueries(0):
+            reactions.counts(self.post.pk)
+
+    def test_deleted_post_leaves_no_reactions(self):
+        """Удалённый пост уносит с собой реакции и счётчики."""
+        for user in self.users[:3]:
+            reactions.react(user, self.post.pk, Reaction.LIKE)
+        self.post.delete()
+        self.assertFalse(Reaction.objects.exists())
+        self.assertFalse(ReactionCounter.objects.exists())
+        self.assertEqual(reactions.counts(self.post.pk), {})
+
+    def test_toggle_from_post_page(self):
+        """Кнопка реакции ставит её, повторное нажатие снимает."""
+        client = Client()
+        client.force_login(self.users[0])
+        url = reverse('posts:post_react', args=(self.post.pk, 'heart'))
+        detail = reverse('posts:post_detail', args=(self.post.pk,))
+        client.post(url)
+        heart = client.get(detail).context['reactions'][1]
+        self.assertEqual(heart, ('heart', 'Люблю', 1, True))
+        client.post(url)
+        heart = client.get(detail).context['reactions'][1]
+        self.assertEqual(heart, ('heart', 'Люблю', 0, False))
+        response = client.post(
+            reverse('posts:post_react', args=(self.post.pk, 'angry')))
+        self.assertEqual(response.status_code, 404)
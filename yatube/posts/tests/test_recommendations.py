@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from jobs.models import Job
+from jobs.queue import run_pending
+
+from .. import recommendations
+from ..models import Follow, Group, GroupFollow, Post, User
+
+
+@override_settings(JOBS_EAGER=False)
+class RecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.friend = User.objects.create_user(username='friend')
+        self.popular = User.objects.create_user(username='popular')
+        self.neighbour = User.objects.create_user(username='neighbour')
+        self.active = User.objects.create_user(username='active')
+        group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание')
+        Follow.objects.create(user=self.reader, author=self.friend)
+        Follow.objects.create(user=self.friend, author=self.popular)
+        GroupFollow.objects.create(user=self.reader, group=group)
+        GroupFollow.objects.create(user=self.neighbour, group=group)
+        for __ in range(3):
+            Post.objects.create(author=self.active, text='Пост')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_scores_second_degree_groups_and_activity(self):
+        """Друзья друзей важнее соседей по группам, новичкам
+        предлагаются активные авторы."""
+        self.assertEqual(
+            [author_id for author_id, _ in recommendations.compute(
+                self.reader.pk)],
+            [self.popular.pk, self.neighbour.pk])
+        newcomer = User.objects.create_user(username='newcomer')
+        self.assertEqual(recommendations.compute(newcomer.pk)[0][0],
+                         self.active.pk)
+
+    def test_list_is_computed_in_background(self):
+        """Промах кэша не считает рекомендации в запросе."""
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['suggested_authors']), [])
+        run_pending()
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['suggested_authors'][0],
+                         self.popular)
+
+    def test_repeated_misses_queue_one_job(self):
+        """Пока пересчёт в очереди, промахи не пишут в неё снова."""
+        self.assertEqual(recommendations.for_user(self.reader), [])
+        with self.assertNumQueries(0):
+            self.assertEqual(recommendations.for_user(self.reader), [])
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_follow_refreshes_cached_list(self):
+        """Подписка убирает автора из списка сразу, пересчёт - в фоне."""
+        recommendations.refresh(self.reader.pk)
+        self.client.get(reverse('posts:profile_follow',
+                                args=(self.popular.username,)))
+        self.assertNotIn(self.popular.pk, dict(
+            recommendations.for_user(self.reader)))
+        Follow.objects.create(user=self.popular, author=self.active)
+        run_pending()
+        self.assertEqual(recommendations.for_user(self.reader)[0][0],
+                         self.active.pk)
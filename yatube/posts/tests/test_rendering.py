@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, User
+from ..rendering import EXCERPT_LENGTH, backfill
+
+
+class RenderingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.client = Client()
+
+    def test_rendered_on_save(self):
+        """HTML и анонс считаются при сохранении и правке поста."""
+        post = Post.objects.create(
+            author=self.author, text='<b>Жирный</b>\nвторая строка')
+        self.assertEqual(
+            post.text_html,
+            '<p>&lt;b&gt;Жирный&lt;/b&gt;<br>вторая строка</p>')
+        self.assertEqual(post.excerpt, '<b>Жирный</b> вторая строка')
+        post.text = 'слово ' * 100
+        post.save()
+        self.assertEqual(len(post.excerpt), EXCERPT_LENGTH)
+        self.assertTrue(post.excerpt.endswith('…'))
+
+    def test_feed_loads_excerpt_only(self):
+        """Лента не читает полный текст, страница поста - готовый HTML."""
+        post = Post.objects.create(
+            author=self.author, text='Первая\n<i>вторая</i>')
+        page = self.client.get(reverse('posts:index')).context['page_obj']
+        self.assertEqual(
+            page[0].get_deferred_fields(), {'text', 'text_html'})
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,)))
+        self.assertEqual(
+            response.context['post'].get_deferred_fields(), {'text'})
+        self.assertContains(response, 'Первая<br>&lt;i&gt;вторая&lt;/i&gt;')
+
+    def test_backfill(self):
+        """Команда заполняет колонки у постов, сохранённых без них."""
+        post = Post.objects.create(author=self.author, text='a\nb')
+        Post.objects.filter(pk=post.pk).update(text_html='', excerpt='')
+        self.assertEqual(backfill(chunk_size=1), 1)
+        post.refresh_from_db()
+        self.assertEqual(
+            (post.text_html, post.excerpt), ('<p>a<br>b</p>', 'a b'))
@@ -0,0 +1,165 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, router
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import buffers
+from ..models import Comment, Group, Post, User
+from ..sharding import (ShardedQuerySet, bucket_for, next_id,
+                        shard_for_author, shard_for_post)
+
+SHARDS = ['default', 'shard1', 'shard2']
+
+
+@override_settings(POST_SHARDS=SHARDS, POST_SHARD_BUCKETS=8)
+class ShardMapTests(TestCase):
+    def test_post_ids_point_to_author_shard(self):
+        """id поста ведёт на тот же шард, что и id его автора."""
+        for author_id in range(1, 20):
+            with self.subTest(author_id=author_id):
+                post_id = next_id(author_id)
+                self.assertEqual(bucket_for(post_id), bucket_for(author_id))
+                self.assertEqual(shard_for_post(post_id),
+                                 shard_for_author(author_id))
+
+    def test_router_sends_posts_and_comments_to_author_shard(self):
+        """Пост, его комментарии и посты автора читаются с одного шарда."""
+        author = User(pk=5, username='author')
+        post = Post(pk=next_id(author.pk), author=author)
+        comment = Comment(post=post, author=User(pk=6))
+        expected = shard_for_author(author.pk)
+        self.assertEqual(router.db_for_write(Post, instance=post), expected)
+        self.assertEqual(router.db_for_read(Post, instance=author), expected)
+        self.assertEqual(router.db_for_read(Comment, instance=post),
+                         expected)
+        self.assertEqual(router.db_for_write(Comment, instance=comment),
+                         expected)
+
+
+class ShardedQuerySetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = User.objects.create_user(username='first')
+        cls.second = User.objects.create_user(username='second')
+        for number in range(7):
+            Post.objects.create(
+                author=cls.first if number % 3 else cls.second,
+                text=f'Тестовый пост {number}')
+
+    def test_merge_keeps_feed_order(self):
+        """Слияние выборок по авторам совпадает с общей лентой."""
+        posts = Post.objects.order_by('-pub_date', '-pk')
+        merged = ShardedQuerySet([posts.filter(author=self.first),
+                                  posts.filter(author=self.second)])
+        expected = list(posts)
+        self.assertEqual(merged.count(), len(expected))
+        self.assertEqual(list(merged), expected)
+        self.assertEqual(merged[2:5], expected[2:5])
+        self.assertEqual(merged[4], expected[4])
+
+
+@override_settings(POST_SHARDS=SHARDS, POST_SHARD_BUCKETS=8, POSTS_ON_PAGE=4)
+class ShardedDatabaseTests(TestCase):
+    """Посты на трёх SQLite-базах."""
+    databases = set(SHARDS)
+
+    @classmethod
+    def setUpClass(cls):
+        cls.shard_dir = tempfile.mkdtemp()
+        for alias in SHARDS[1:]:
+            connections.databases[alias] = {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': os.path.join(cls.shard_dir, f'{alias}.sqlite3'),
+            }
+            connections.ensure_defaults(alias)
+            connections.prepare_test_settings(alias)
+            with override_settings(POST_SHARDS=SHARDS):
+                call_command('migrate', database=alias, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in SHARDS[1:]:
+            connections[alias].close()
+            del connections[alias]
+            del connections.databases[alias]
+        shutil.rmtree(cls.shard_dir, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_cover_every_post_once(self):
+        """Страницы лент со всех шардов идут по (pub_date, pk) без
+        повторов и пропусков, даже если время публикации совпадает."""
+        group = Group.objects.create(title='Группа', slug='group')
+        authors = [User.objects.create_user(username=f'author{number}')
+                   for number in range(6)]
+        self.assertEqual(
+            {shard_for_author(author.pk) for author in authors}, set(SHARDS))
+        for author in authors:
+            for number in range(2):
+                Post.objects.create(
+                    author=author, group=group, text=f'Пост {number}')
+        moment = timezone.now()
+        for alias in SHARDS:
+            Post.objects.using(alias).update(pub_date=moment)
+        expected = sorted(
+            (post.pk for alias in SHARDS
+             for post in Post.objects.using(alias).all()), reverse=True)
+        self.assertEqual(len(expected), 12)
+        client = Client()
+        for url in (reverse('posts:index'),
+                    reverse('posts:group_list', args=(group.slug,))):
+            with self.subTest(url=url):
+                seen = []
+                for page in range(1, 4):
+                    response = client.get(url, {'page': page})
+                    seen.extend(
+                        post.pk for post in response.context['page_obj'])
+                self.assertEqual(seen, expected)
+
+    @override_settings(WRITE_BEHIND_ENABLED=True, WRITE_BEHIND_FLUSH_MS=60000,
+                       WRITE_BEHIND_MAX_ITEMS=100)
+    def test_comment_flush_commits_each_shard(self):
+        """Комментарии пишутся на шард поста, и ошибка на одном шарде
+        не откатывает и не повторяет уже записанный."""
+        self.addCleanup(buffers.comments.clear)
+        authors = {}
+        for number in range(12):
+            author = User.objects.create_user(username=f'author{number}')
+            authors.setdefault(shard_for_author(author.pk), author)
+        first, second = [Post.objects.create(author=authors[alias])
+                         for alias in SHARDS[1:]]
+        for post in (first, second):
+            buffers.save_comment(
+                Comment(post=post, author=post.author, text='Комментарий'))
+        changed = buffers.comments_changed
+        calls = []
+
+        def fail_second_shard(comments):
+            calls.append(comments)
+            if len(calls) > 1:
+                raise RuntimeError
+            changed(comments)
+        with mock.patch.object(buffers, 'comments_changed',
+                               fail_second_shard):
+            with self.assertRaises(RuntimeError):
+                buffers.comments.flush()
+        self.assertEqual(
+            list(Comment.objects.using(SHARDS[1]).values_list(
+                'post_id', flat=True)), [first.pk])
+        self.assertFalse(Comment.objects.using(SHARDS[2]).exists())
+        buffers.comments.flush()
+        for alias, post in zip(SHARDS[1:], (first, second)):
+            with self.subTest(alias=alias):
+                self.assertEqual(
+                    list(Comment.objects.using(alias).values_list(
+                        'post_id', flat=True)), [post.pk])
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from core.purge import dispatcher
+
+from ..models import Comment, Group, Post, User
+
+
+class SurrogateKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='-')
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Пост #django')
+        self.client = Client()
+
+    def test_pages_are_tagged(self):
+        """Страницы несут ключи своих постов и своей ленты."""
+        post = f'post-{self.post.pk}'
+        pages = {
+            reverse('posts:index'): ['index', post],
+            reverse('posts:group_list', args=('group',)): ['group-', post],
+            reverse('posts:tag_list', args=('django',)): ['tag-django', post],
+            reverse('posts:profile', args=('author',)): ['author-', post],
+            reverse('posts:post_detail', args=(self.post.pk,)): [
+                post, f'author-{self.author.pk}', f'group-{self.group.pk}'],
+        }
+        for url, expected in pages.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                keys = response['Surrogate-Key']
+                for key in expected:
+                    self.assertIn(key, keys)
+                self.assertEqual(response['Surrogate-Control'], 'max-age=300')
+
+    def test_logged_in_pages_are_not_edge_cached(self):
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('posts:profile', args=('author',)))
+        self.assertIn('Surrogate-Key', response)
+        self.assertNotIn('Surrogate-Control', response)
+
+
+class PurgeOnChangeTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='-')
+        patcher = mock.patch.object(dispatcher, 'purge')
+        self.purge = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def purged(self):
+        keys = set()
+        for call in self.purge.call_args_list:
+            keys.update(call[0][0])
+        self.purge.reset_mock()
+        return keys
+
+    def test_changes_purge_affected_pages(self):
+        """Пост, комментарий и группа сбрасывают свои страницы после
+        фиксации транзакции."""
+        self.purged()
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='#Django @author')
+        self.assertEqual(self.purged(), {
+            f'post-{post.pk}', f'author-{self.author.pk}',
+            f'group-{self.group.pk}', 'index', 'tag-django',
+            'mentions-author'})
+        Comment.objects.create(post=post, author=self.author, text='да')
+        self.assertEqual(self.purged(), {f'post-{post.pk}'})
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(self.purged(), {f'group-{self.group.pk}'})
+        key = f'post-{post.pk}'
+        post.delete()
+        self.assertIn(key, self.purged())
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_posts
+from ..models import Mention, Post, PostTag, User
+from ..tags import backfill, extract_mentions, extract_tags
+
+
+class TagTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.mentioned = User.objects.create_user(username='mr.smith')
+        self.client = Client()
+
+    def test_extraction(self):
+        """Теги приводятся к нижнему регистру, e-mail не упоминание."""
+        text = 'Привет, @mr.smith! #Django и #django, пишите на a@b.ru &#39;'
+        self.assertEqual(extract_tags(text), {'django'})
+        self.assertEqual(extract_mentions(text), {'mr.smith'})
+
+    def test_tag_and_mention_feeds(self):
+        """Посты попадают в ленты тега и упоминаний, в том числе
+        после правки и переноса в архив."""
+        tagged = Post.objects.create(
+            author=self.author, text='#Django для @mr.smith')
+        Post.objects.create(author=self.author, text='Без тегов')
+        old = Post.objects.create(author=self.author, text='Старый #django')
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - timedelta(days=30))
+        archive_posts(timezone.now() - timedelta(days=1))
+        feeds = {
+            reverse('posts:tag_list', args=('DJANGO',)): [tagged.pk, old.pk],
+            reverse('posts:mention_list', args=('mr.smith',)): [tagged.pk],
+        }
+        for url, expected in feeds.items():
+            with self.subTest(url=url):
+                page = self.client.get(url).context['page_obj']
+                self.assertEqual([post.pk for post in page], expected)
+        tagged.text = 'Теперь #python'
+        tagged.save()
+        self.assertFalse(Mention.objects.exists())
+        self.assertEqual(
+            set(PostTag.objects.values_list('name', flat=True)),
+            {'python', 'django'})
+
+    def test_backfill(self):
+        """Команда заполняет индекс для постов, сохранённых без него."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост #tag{number % 3}')
+            for number in range(7))
+        self.assertFalse(PostTag.objects.exists())
+        self.assertEqual(backfill(chunk_size=3), 7)
+        self.assertEqual(PostTag.objects.filter(name='tag0').count(), 3)
+
+    def test_deleted_post_leaves_no_tags(self):
+        """Удалённый пост уносит с собой теги и упоминания."""
+        post = Post.objects.create(
+            author=self.author, text='#Django для @mr.smith')
+        post.delete()
+        self.assertFalse(PostTag.objects.exists())
+        self.assertFalse(Mention.objects.exists())
@@ -0,0 +1,77 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from jobs.queue import run_pending
+
+from .. import buffers, trending
+from ..models import Post, TrendingScore, User
+
+
+@override_settings(TRENDING_SIZE=2)
+class TrendingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        buffers.views.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.posts = [
+            Post.objects.create(author=self.user, text=f'Пост {number}')
+            for number in range(3)]
+        self.client = Client()
+
+    def test_score_decays_with_time(self):
+        """Свежее событие весит столько же, сколько вдвое большее
+        событие, случившееся на период полураспада раньше."""
+        half_life = 6 * 3600
+        now = time.time()
+        self.assertAlmostEqual(
+            trending.now_score(1, now),
+            trending.now_score(2, now - half_life))
+        self.assertAlmostEqual(
+            trending.add_scores(trending.now_score(1, now),
+                                trending.now_score(1, now)),
+            trending.now_score(2, now))
+
+    def test_bump_compares_with_primary(self):
+        """Рейтинг читается с основной базы и внутри use_replica."""
+        post = self.posts[0]
+        with mock.patch('core.routers.current_replica',
+                        return_value='stale_replica'):
+            trending.bump(post.pk, 1)
+            trending.bump(post.pk, 1)
+        score = TrendingScore.objects.get(post_id=post.pk).score
+        self.assertAlmostEqual(score, trending.now_score(2), places=3)
+
+    def test_events_rank_posts(self):
+        """Комментарии и просмотры разных зрителей поднимают пост, в ленте
+        только топ."""
+        self.client.force_login(self.user)
+        first, second, third = self.posts
+        self.client.get(reverse('posts:post_detail', args=(first.pk,)))
+        for __ in range(2):
+            self.client.post(reverse('posts:add_comment', args=(third.pk,)),
+                             {'text': 'Комментарий'})
+        self.client.get(reverse('posts:post_detail', args=(second.pk,)))
+        Client().get(reverse('posts:post_detail', args=(second.pk,)))
+        buffers.views.flush()
+        run_pending()
+        with self.assertNumQueries(0):
+            top = trending.get_top()
+        self.assertEqual([post_id for post_id, _ in top],
+                         [third.pk, second.pk])
+        cache.clear()
+        self.assertEqual(trending.get_top(), top)
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(list(response.context['page_obj']), [third, second])
+
+    def test_compact_drops_expired(self):
+        """Сжатие удаляет рейтинги, затухшие ниже порога."""
+        TrendingScore.objects.create(
+            post_id=self.posts[0].pk,
+            score=trending.now_score(1, time.time() - 7 * 24 * 3600))
+        trending.bump(self.posts[1].pk, 1)
+        self.assertEqual(trending.compact(), 1)
+        self.assertEqual(trending.get_top()[0][0], self.posts[1].pk)
@@ -163,13 +163,30 @@ class PostPagesTests(TestCase):
             group=self.group,
             image=self.uploaded,)
         content1 = self.authorized_client.get(reverse('posts:index')).content
-        new_post.delete()
+        # Удаление в обход сигналов: они сбросили бы оболочку главной.
+        Post.objects.filter(pk=new_post.pk)._raw_delete('default')
         content2 = self.authorized_client.get(reverse('posts:index')).content
         self.assertEqual(content1, content2)
         cache.clear()
         content3 = self.authorized_client.get(reverse('posts:index')).content
         self.assertNotEqual(content1, content3)
 
+    def test_index_cache_expires_when_post_deleted(self):
+        """Удаление поста сбрасывает закэшированную главную."""
+        new_post = Post.objects.create(
+            author=self.user, text='Пост для проверки кэша', group=self.group)
+        content1 = self.authorized_client.get(reverse('posts:index')).content
+        new_post.delete()
+        content2 = self.authorized_client.get(reverse('posts:index')).content
+        self.assertNotEqual(content1, content2)
+
+    def test_index_cache_is_not_shared_between_users(self):
+        """Анониму не достаётся главная, собранная для пользователя."""
+        self.authorized_client.get(reverse('posts:index'))
+        response = Client().get(reverse('posts:index'))
+        self.assertNotContains(response, 'Выйти')
+        self.assertNotContains(response, 'Пользователь:')
+
 
 class FollowViewsTests(TestCase):
     @classmethod
@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import buffers
+from ..models import Post, User
+
+
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        buffers.views.clear()
+        self.author = User.objects.create_user(username='author')
+        self.posts = [Post.objects.create(author=self.author, text='Пост')
+                      for __ in range(2)]
+        self.url = reverse('posts:post_detail', args=(self.posts[0].pk,))
+
+    def tearDown(self):
+        buffers.views.clear()
+
+    def test_views_are_buffered_and_deduplicated(self):
+        """Просмотры видны сразу, повтор из той же сессии не считается,
+        а в базу всё уходит одним UPDATE."""
+        client = Client()
+        client.force_login(self.author)
+        for __ in range(3):
+            response = client.get(self.url)
+        Client().get(self.url)
+        Client().get(reverse('posts:post_detail', args=(self.posts[1].pk,)))
+        self.assertContains(response, 'Просмотров: 1')
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).views, 0)
+        with CaptureQueriesContext(connection) as queries:
+            buffers.views.write(buffers.views.pending())
+        self.assertEqual(len([
+            query for query in queries
+            if query['sql'].startswith('UPDATE "posts_post"')]), 1)
+        buffers.views.clear()
+        self.assertEqual(
+            [post.views for post in Post.objects.order_by('pk')], [2, 1])
+
+    @override_settings(VIEWS_DEDUP_SECONDS=0, VIEWS_FLUSH_SECONDS=0)
+    def test_buffer_flushes_after_interval(self):
+        """По истечении интервала буфер сбрасывает сам просмотр."""
+        Client().get(self.url)
+        Client().get(self.url)
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).views, 2)
+        self.assertEqual(buffers.views.pending(), {})
+
+    def test_failed_flush_does_not_repeat_written_views(self):
+        """Если после UPDATE сброс упал, просмотры не прибавятся дважды."""
+        Client().get(self.url)
+        with mock.patch('posts.buffers.queue_trending',
+                        side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                buffers.views.flush()
+        self.assertEqual(buffers.views.pending(), {})
+        buffers.views.flush()
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).views, 1)
+
+    @override_settings(VIEWS_DEDUP_SECONDS=0)
+    def test_cached_page_reads_views_from_cache(self):
+        """Страница поста из оболочки не ходит в базу за просмотрами и
+        реакциями, а счётчик не сбивается после сброса буфера."""
+        Client().get(self.url)
+        with self.assertNumQueries(0):
+            response = Client().get(self.url)
+        self.assertContains(response, 'Просмотров: 2')
+        buffers.views.flush()
+        with self.assertNumQueries(0):
+            response = Client().get(self.url)
+        self.assertContains(response, 'Просмотров: 3')
+        client = Client()
+        client.force_login(self.author)
+        client.get(self.url)
+        with self.assertNumQueries(0):
+            client.get(self.url)
@@ -0,0 +1,131 @@
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, router, transaction
+
+from core.buffers import BufferedWriter
+
+from .models import TrendingScore
+from .rendering import for_cards
+from .sharding import posts_by_ids
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = 'trending_top'
+# Каждый процесс правит свою копию списка; раз в CACHE_SECONDS она
+# перечитывается из базы и подхватывает события других процессов.
+CACHE_SECONDS = 300
+# Попыток записи рейтинга при конкурентных обновлениях.
+MAX_RETRIES = 10
+
+
+def now_score(weight=1, moment=None):
+    """Вклад события с весом weight в момент moment в шкале score."""
+    moment = time.time() if moment is None else moment
+    return math.log2(weight) + moment / (settings.TRENDING_HALF_LIFE * 3600)
+
+
+def add_scores(first, second):
+    """log2(2**first + 2**second) без переполнения."""
+    high, low = max(first, second), min(first, second)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def bump(post_id, weight):
+    """Добавляет посту вес weight; конкурентные обновления не теряются.
+
+    Сравнение с записью читает основную базу: с отстающей реплики
+    прежний score никогда не совпадёт с текущим. Если за MAX_RETRIES
+    попыток запись так и не удалась, событие пропускается.
+    """
+    increment = now_score(weight)
+    scores = TrendingScore.objects.using(router.db_for_write(TrendingScore))
+    for _ in range(MAX_RETRIES):
+        current = scores.filter(
+            post_id=post_id).values_list('score', flat=True).first()
+        if current is None:
+            try:
+                with transaction.atomic(using=scores.db):
+                    scores.create(post_id=post_id, score=increment)
+            except IntegrityError:
+                continue
+            update_top(post_id, increment)
+            return
+        score = add_scores(current, increment)
+        if scores.filter(post_id=post_id, score=current).update(score=score):
+            update_top(post_id, score)
+            return
+    logger.warning('Не удалось обновить рейтинг поста %s', post_id)
+
+
+class ScoreBuffer(BufferedWriter):
+    """Складывает веса событий одного поста до сброса в базу."""
+
+    def bump(self, post_id, weight):
+        self.accumulate(post_id, weight)
+
+    def merge(self, unwritten, newer):
+        return unwritten + newer
+
+    def write(self, items):
+        for post_id, weight in items.items():
+            bump(post_id, weight)
+
+
+scores = ScoreBuffer('posts.trending.scores')
+
+
+def record(post_id, event):
+    weight = settings.TRENDING_WEIGHTS[event]
+    if settings.WRITE_BEHIND_ENABLED:
+        scores.bump(post_id, weight)
+    else:
+        bump(post_id, weight)
+
+
+def rebuild_top():
+    top = list(TrendingScore.objects.using(
+        router.db_for_write(TrendingScore)).order_by('-score').values_list(
+        'post_id', 'score')[:settings.TRENDING_SIZE])
+    cache.set(CACHE_KEY, top, CACHE_SECONDS)
+    return top
+
+
+def get_top():
+    """Лучшие посты [(post_id, score), ...]; читаются из кэша, а при
+    промахе - по индексу на score, не глядя на размер таблицы."""
+    top = cache.get(CACHE_KEY)
+    if top is None:
+        top = rebuild_top()
+    return top
+
+
+def update_top(post_id, score):
+    top = [entry for entry in get_top() if entry[0] != post_id]
+    if len(top) < settings.TRENDING_SIZE or score > top[-1][1]:
+        top.append((post_id, score))
+        top.sort(key=lambda entry: entry[1], reverse=True)
+        del top[settings.TRENDING_SIZE:]
+    cache.set(CACHE_KEY, top, CACHE_SECONDS)
+
+
+def compact():
+    """Удаляет затухшие рейтинги и пересобирает кэш; запускать по
+    расписанию."""
+    expired = now_score(settings.TRENDING_MIN_SCORE)
+    deleted, _ = TrendingScore.objects.filter(score__lt=expired).delete()
+    rebuild_top()
+    return deleted
+
+
+def trending_posts():
+    """Популярные посты по убыванию рейтинга, сейчас затухшие пропускаются."""
+    expired = now_score(settings.TRENDING_MIN_SCORE)
+    post_ids = [post_id for post_id, score in get_top() if score >= expired]
+    posts = posts_by_ids(
+        post_ids, build=lambda queryset: for_cards(queryset.select_related(
+            'group', 'author')))
+    return [posts[post_id] for post_id in post_ids if post_id in posts]
@@ -7,16 +7,37 @@ app_name = 'posts'
 urlpatterns = [
     path('', views.index, name='index'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/import/', views.follow_import, name='follow_import'),
+    path('live/', views.live_feed, {'feed': 'index'}, name='live_index'),
+    path('live/follow/', views.live_feed, {'feed': 'follow'},
+         name='live_follow'),
+    path('live/group/<slug>/', views.live_feed, {'feed': 'group'},
+         name='live_group'),
+    path('notifications/', views.notification_list, name='notifications'),
+
+    path('feed/', views.personal_feed, name='personal_feed'),
 
     path('group/<slug>/', views.group_posts, name='group_list'),
+    path('group/<slug>/follow/', views.group_follow, name='group_follow'),
+    path('group/<slug>/follow-authors/', views.group_follow_authors,
+         name='group_follow_authors'),
+    path('group/<slug>/unfollow/', views.group_unfollow,
+         name='group_unfollow'),
+
+    path('trending/', views.trending_posts, name='trending'),
+    path('tag/<str:name>/', views.tag_posts, name='tag_list'),
 
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
+    path('posts/<int:post_id>/react/<str:kind>/', views.post_react,
+         name='post_react'),
 
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('profile/<str:username>/mentions/', views.mention_posts,
+         name='mention_list'),
     path('profile/<str:username>/follow/', views.profile_follow,
          name='profile_follow'),
     path('profile/<str:username>/unfollow/', views.profile_unfollow,
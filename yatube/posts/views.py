@@ -1,57 +1,143 @@
+import time
+
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
+
+from core.holes import cache_shell
+from core.purge import add_surrogate_keys
+from core.routers import use_replica
 
-from .forms import CommentForm, PostForm
-from .models import Group, Post, User
+from . import (buffers, live, lookups, markup, notifications, reactions,
+               recommendations, surrogate, tags, trending)
+from .archive import ChainedQuerySet, get_post_or_404, with_archive
+from .feeds import merged_feed
+from .forms import CommentForm, FollowImportForm, PostForm
+from .models import GroupFollow, Post, Reaction, User
+from .rendering import for_cards
+from .sharding import distinct_values, posts_for_id
+from .tasks import (queue_notifications, queue_recommendations,
+                    queue_thumbnail)
 from .utils import paginator
 
 
-@cache_page(20, key_prefix='index_page')
+@use_replica
+@cache_shell
 def index(request):
     """Главная страница."""
-    post_list = Post.objects.select_related('group', 'author')
+    post_list = with_archive(
+        lambda posts: for_cards(posts.select_related('group', 'author')))
+    page_obj = paginator(request, post_list)
     context = {
-        'page_obj': paginator(request, post_list),
+        'page_obj': page_obj,
     }
-    return render(request, 'posts/index.html', context)
+    return add_surrogate_keys(
+        request, render(request, 'posts/index.html', context),
+        [surrogate.INDEX_KEY, *surrogate.page_keys(page_obj)])
 
 
+@use_replica
+@cache_shell
 def group_posts(request, slug):
     """Все посты группы."""
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author')
+    group = lookups.groups.get_or_404(slug)
+    post_list = with_archive(
+        lambda posts: for_cards(posts.filter(
+            group_id=group.pk).select_related('author')))
+    page_obj = paginator(request, post_list)
     context = {
         'group': group,
-        'page_obj': paginator(request, post_list),
+        'page_obj': page_obj,
+    }
+    return add_surrogate_keys(
+        request, render(request, 'posts/group_list.html', context),
+        [surrogate.group_key(group.pk), *surrogate.page_keys(page_obj)])
+
+
+@use_replica
+@cache_shell
+def tag_posts(request, name):
+    """Все посты с хэштегом."""
+    name = name.lower()
+    post_list = with_archive(
+        lambda posts: for_cards(posts.filter(
+            pk__in=tags.tagged(name)).select_related('group', 'author')))
+    page_obj = paginator(request, post_list)
+    context = {
+        'tag': name,
+        'page_obj': page_obj,
     }
-    return render(request, 'posts/group_list.html', context)
+    return add_surrogate_keys(
+        request, render(request, 'posts/tag_list.html', context),
+        [surrogate.tag_key(name), *surrogate.page_keys(page_obj)])
 
 
+@use_replica
+@cache_shell
+def mention_posts(request, username):
+    """Посты, в которых упомянут пользователь."""
+    user = lookups.users.get_or_404(username)
+    post_list = with_archive(
+        lambda posts: for_cards(posts.filter(
+            pk__in=tags.mentioning(user)).select_related('group', 'author')))
+    page_obj = paginator(request, post_list)
+    context = {
+        'author': user,
+        'page_obj': page_obj,
+    }
+    return add_surrogate_keys(
+        request, render(request, 'posts/mention_list.html', context),
+        [surrogate.mentions_key(user.username),
+         *surrogate.page_keys(page_obj)])
+
+
+@use_replica
+def trending_posts(request):
+    """Популярные посты."""
+    page_obj = paginator(request, trending.trending_posts())
+    context = {
+        'page_obj': page_obj,
+    }
+    return add_surrogate_keys(
+        request, render(request, 'posts/trending.html', context),
+        [surrogate.TRENDING_KEY, *surrogate.page_keys(page_obj)])
+
+
+@use_replica
+@cache_shell
 def profile(request, username):
     """Профиль пользователя."""
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related('group')
-    following = (
-        request.user.is_authenticated
-        and author.following.filter(user=request.user).exists())
+    author = lookups.users.get_or_404(username)
+    post_list = ChainedQuerySet(
+        for_cards(author.posts.select_related('group')),
+        for_cards(author.archived_posts.select_related('group')))
+    page_obj = paginator(request, post_list)
     context = {
         'author': author,
-        'page_obj': paginator(request, post_list),
-        'following': following,
+        'page_obj': page_obj,
     }
-    return render(request, 'posts/profile.html', context)
+    return add_surrogate_keys(
+        request, render(request, 'posts/profile.html', context),
+        [surrogate.author_key(author.pk), *surrogate.page_keys(page_obj)])
 
 
+@use_replica
+@cache_shell
 def post_detail(request, post_id):
     """Страница отдельного поста."""
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = get_post_or_404(post_id, deferred=('text',))
+    comments = [*post.comments.all(), *buffers.comments.for_post(post.pk)]
+    for comment, html in zip(comments, markup.render_many(
+            [comment.text for comment in comments])):
+        comment.text_html = html
     form = CommentForm(request.POST or None)
     context = {'post': post,
                'form': form,
                'comments': comments}
-    return render(request, 'posts/post_detail.html', context)
+    return add_surrogate_keys(
+        request, render(request, 'posts/post_detail.html', context),
+        surrogate.post_detail_keys(post))
 
 
 @login_required
@@ -63,6 +149,8 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        queue_thumbnail(post)
+        queue_notifications(post)
         return redirect('posts:profile', post.author)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -70,14 +158,14 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     """Редактирование поста."""
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(posts_for_id(post_id), pk=post_id)
     if request.user != post.author:
         return redirect('posts:post_detail', post.pk)
     form = PostForm(request.POST or None,
                     files=request.FILES or None,
                     instance=post)
     if form.is_valid():
-        form.save()
+        queue_thumbnail(form.save())
         return redirect('posts:post_detail', post.pk)
     context = {
         'form': form,
@@ -89,39 +177,174 @@ def post_edit(request, post_id):
 @login_required
 def add_comment(request, post_id):
     """Добавить комментарий."""
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(posts_for_id(post_id), pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        buffers.save_comment(comment)
+        trending.record(post.pk, 'comment')
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@login_required
+@require_POST
+def post_react(request, post_id, kind):
+    """Поставить или снять реакцию."""
+    if kind not in dict(Reaction.KINDS):
+        raise Http404('Нет такой реакции.')
+    get_object_or_404(posts_for_id(post_id), pk=post_id)
+    reactions.toggle(request.user, post_id, kind)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
     """Посты избранных авторов."""
-    post_list = Post.objects.filter(
-        author__following__user=request.user)
-    context = {'page_obj': paginator(request, post_list)}
-    return render(request, 'posts/follow.html', context)
+    authors = buffers.followed_author_ids(request.user)
+    post_list = with_archive(
+        lambda posts: for_cards(posts.filter(
+            author_id__in=authors).select_related('group', 'author')))
+    suggested = dict(recommendations.for_user(request.user))
+    page_obj = paginator(request, post_list)
+    context = {
+        'page_obj': page_obj,
+        'suggested_authors': sorted(
+            User.objects.filter(pk__in=suggested),
+            key=lambda author: -suggested[author.pk]),
+    }
+    return add_surrogate_keys(
+        request, render(request, 'posts/follow.html', context),
+        surrogate.page_keys(page_obj))
+
+
+def live_feed(request, feed, slug=None):
+    """Поток событий о новых постах ленты feed в формате SSE."""
+    if feed == 'group':
+        group = lookups.groups.get_or_404(slug)
+
+        def accept(event):
+            return event['group'] == group.slug
+    elif feed == 'follow':
+        if not request.user.is_authenticated:
+            return redirect('users:login')
+        authors = set(User.objects.filter(
+            pk__in=buffers.followed_author_ids(request.user)
+        ).values_list('username', flat=True))
+
+        def accept(event):
+            return event['author'] in authors
+    else:
+        def accept(event):
+            return True
+    cursor = request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get(
+        'since')
+    try:
+        cursor = float(cursor)
+    except (TypeError, ValueError):
+        cursor = time.time()
+    response = StreamingHttpResponse(
+        live.stream(cursor, accept), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def notification_list(request):
+    """Уведомления о новых постах; показанные на странице отмечаются
+    прочитанными."""
+    page_obj = paginator(
+        request, request.user.notifications.select_related('author'))
+    # Страница строится до отметки, чтобы новые были видны как новые.
+    page_obj.object_list = list(page_obj.object_list)
+    notifications.mark_read(
+        request.user,
+        [notification.pk for notification in page_obj.object_list])
+    return render(request, 'posts/notifications.html',
+                  {'page_obj': page_obj})
+
+
+@login_required
+def personal_feed(request):
+    """Посты избранных авторов и групп одной лентой."""
+    authors = buffers.followed_author_ids(request.user)
+    groups = list(request.user.group_follows.values_list(
+        'group_id', flat=True))
+    builds = []
+    if authors:
+        builds.append(lambda posts: posts.filter(author_id__in=authors))
+    if groups:
+        builds.append(lambda posts: posts.filter(group_id__in=groups))
+    page_obj = merged_feed(builds, request.GET.get('after'))
+    context = {
+        'page_obj': page_obj,
+    }
+    return add_surrogate_keys(
+        request, render(request, 'posts/feed.html', context),
+        surrogate.page_keys(page_obj))
+
+
+@login_required
+def follow_import(request):
+    """Подписка на список авторов по именам."""
+    form = FollowImportForm(request.POST or None)
+    if form.is_valid():
+        authors = User.objects.filter(
+            username__in=form.cleaned_data['usernames']).values_list(
+            'pk', flat=True)
+        buffers.follow_many(request.user, authors)
+        queue_recommendations(request.user.pk)
+        return redirect('posts:follow_index')
+    return render(request, 'posts/follow_import.html', {'form': form})
+
+
+@login_required
+def group_follow_authors(request, slug):
+    """Подписка на всех авторов группы."""
+    group = lookups.groups.get_or_404(slug)
+    if request.method == 'POST':
+        buffers.follow_many(request.user, distinct_values(
+            Post, 'author_id', lambda posts: posts.filter(group=group)))
+        queue_recommendations(request.user.pk)
+    return redirect('posts:group_list', slug)
+
+
+@login_required
+def group_follow(request, slug):
+    """Подписаться на группу."""
+    group = lookups.groups.get_or_404(slug)
+    GroupFollow.objects.bulk_create(
+        [GroupFollow(user=request.user, group=group)], ignore_conflicts=True)
+    return redirect('posts:group_list', slug)
+
+
+@login_required
+def group_unfollow(request, slug):
+    """Отписаться от группы."""
+    group = lookups.groups.get_or_404(slug)
+    group.followers.filter(user=request.user).delete()
+    return redirect('posts:group_list', slug)
 
 
 @login_required
 def profile_follow(request, username):
     """Подписаться на автора."""
-    author = get_object_or_404(User, username=username)
+    author = lookups.users.get_or_404(username)
     if author != request.user:
-        author.following.get_or_create(user=request.user)
+        buffers.set_following(request.user, author, True)
+        latest = author.posts.values_list('pk', flat=True).first()
+        if latest is not None:
+            trending.record(latest, 'follow')
+        recommendations.forget(request.user.pk, author.pk)
+        queue_recommendations(request.user.pk)
     return redirect('posts:profile', username)
 
 
 @login_required
 def profile_unfollow(request, username):
     """Отписаться от автора."""
-    author = get_object_or_404(User, username=username)
-    following = author.following.filter(user=request.user)
-    if following.exists():
-        following.delete()
+    author = lookups.users.get_or_404(username)
+    buffers.set_following(request.user, author, False)
     return redirect('posts:profile', username)
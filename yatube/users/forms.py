@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+from django.template import loader
+
+from jobs.queue import enqueue
 
 User = get_user_model()
 
@@ -8,3 +11,17 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо собирается в запросе, а отправляется фоновой задачей."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        subject = ''.join(
+            loader.render_to_string(subject_template_name, context)
+            .splitlines())
+        body = loader.render_to_string(email_template_name, context)
+        enqueue('users.send_email', subject=subject, body=body,
+                from_email=from_email, recipients=[to_email])
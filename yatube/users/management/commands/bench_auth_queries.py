@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post, User
+
+STANDARD_MIDDLEWARE = [
+    'django.contrib.auth.middleware.AuthenticationMiddleware'
+    if item == 'users.middleware.CachedAuthenticationMiddleware' else item
+    for item in settings.MIDDLEWARE
+]
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает число запросов к базе на страницу для '
+            'авторизованного пользователя до и после кэширования '
+            'сессии и пользователя.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--views', type=int, default=5,
+            help='Сколько раз открывать каждую страницу.')
+
+    def count_queries(self, urls, views):
+        cache.clear()
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(self.user)
+        result = {}
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                for __ in range(views):
+                    client.get(url)
+            result[url] = len(queries) / views
+        return result
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.user = User.objects.create_user(username='bench_auth')
+            post = Post.objects.create(author=self.user, text='Тест')
+            urls = [
+                reverse('posts:index'),
+                reverse('posts:profile', args=(self.user.username,)),
+                reverse('posts:post_detail', args=(post.pk,)),
+                reverse('about:author'),
+            ]
+            with override_settings(
+                    SESSION_ENGINE='django.contrib.sessions.backends.db',
+                    MIDDLEWARE=STANDARD_MIDDLEWARE):
+                before = self.count_queries(urls, options['views'])
+            after = self.count_queries(urls, options['views'])
+            transaction.set_rollback(True)
+        for url in urls:
+            self.stdout.write(
+                f'{url}: {before[url]:.1f} -> {after[url]:.1f} запросов, '
+                f'экономия {before[url] - after[url]:.1f}')
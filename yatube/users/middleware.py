@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+
+def user_cache_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+def get_cached_user(request):
+    """Пользователь сессии из кэша, а при промахе - обычным путём Django.
+
+    Хэш сессии сверяется и для кэшированного объекта, поэтому смена
+    пароля по-прежнему разлогинивает другие сессии.
+    """
+    if not settings.USER_CACHE_SECONDS:
+        return auth.get_user(request)
+    user_id = request.session.get(auth.SESSION_KEY)
+    if user_id is None:
+        return AnonymousUser()
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is not None and constant_time_compare(
+            request.session.get(auth.HASH_SESSION_KEY, ''),
+            user.get_session_auth_hash()):
+        return user
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(key, user, settings.USER_CACHE_SECONDS)
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, которая не читает auth_user на каждый
+    запрос, а держит пользователя в кэше USER_CACHE_SECONDS секунд."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
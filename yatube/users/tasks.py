@@ -0,0 +1,8 @@
+from django.core.mail import send_mail
+
+from jobs.queue import task
+
+
+@task('users.send_email')
+def send_email(subject, body, from_email, recipients):
+    send_mail(subject, body, from_email, recipients)
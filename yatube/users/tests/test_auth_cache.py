@@ -0,0 +1,46 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import User
+
+from ..middleware import user_cache_key
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='auth', password='old-password')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('about:author')
+
+    def test_repeat_request_needs_no_queries(self):
+        """Сессия и пользователь второго запроса берутся из кэша."""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_profile_change_invalidates_cache(self):
+        """Изменение профиля сразу видно в следующем запросе."""
+        self.client.get(self.url)
+        self.user.first_name = 'Новое имя'
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['user'].first_name, 'Новое имя')
+
+    def test_password_change_logs_out_other_sessions(self):
+        """После смены пароля кэшированный пользователь не используется."""
+        self.client.get(self.url)
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    @override_settings(USER_CACHE_SECONDS=0)
+    def test_user_is_not_cached_without_shared_cache(self):
+        """С USER_CACHE_SECONDS=0 пользователь читается из базы."""
+        self.client.get(self.url)
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
@@ -1,20 +1,24 @@
 import os
 
-from dotenv import load_dotenv
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# dotenv нужен только для локальной разработки: на сервере переменные
+# окружения задаёт сам сервер, и лишний импорт не замедляет старт.
+ENV_FILE = os.path.join(BASE_DIR, '.env')
+if os.path.exists(ENV_FILE):
+    from dotenv import load_dotenv
 
-load_dotenv()
+    load_dotenv(ENV_FILE)
 
 SECRET_KEY = str(os.getenv('SECRET_KEY'))
 
 DEBUG = bool(os.getenv('DEBUG', default=False))
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
 ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
     '[::1]',
-    'testserver'
+    'testserver',
     'www.yatubeprojectbydaria.pythonanywhere.com',
     'yatubeprojectbydaria.pythonanywhere.com',
 ]
@@ -24,6 +28,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'jobs.apps.JobsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -36,13 +41,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
 ]
 
 INTERNAL_IPS = [
@@ -64,6 +71,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.notifications.notifications',
             ],
         },
     },
@@ -78,6 +86,42 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: DB_REPLICAS=2 создаст replica1 и replica2.
+# Локально это копии SQLite-файла, их обновляет команда sync_replicas.
+REPLICA_DATABASES = [
+    f'replica{number}'
+    for number in range(1, int(os.getenv('DB_REPLICAS', default=0)) + 1)
+]
+for alias in REPLICA_DATABASES:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db_{alias}.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Шарды постов и комментариев: POST_SHARDS=3 добавит shard1 и shard2.
+# Посты автора лежат на одном шарде, общие ленты собираются со всех.
+POST_SHARDS = ['default'] + [
+    f'shard{number}'
+    for number in range(1, int(os.getenv('POST_SHARDS', default=1)))
+]
+for alias in POST_SHARDS[1:]:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db_{alias}.sqlite3'),
+    }
+
+POST_SHARD_BUCKETS = 64
+
+DATABASE_ROUTERS = [
+    'posts.sharding.ShardRouter',
+    'core.routers.ReplicaRouter',
+]
+
+REPLICA_PIN_COOKIE = 'pin_primary'
+
+REPLICA_PIN_SECONDS = 10
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -107,8 +151,112 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+# collectstatic кладёт рядом с текстовыми файлами их .gz-копии, чтобы
+# веб-сервер отдавал их без сжатия на лету (gzip_static в nginx).
+STATIC_ROOT = os.getenv('STATIC_ROOT',
+                        default=os.path.join(BASE_DIR, 'collected_static'))
+
+STATICFILES_STORAGE = 'core.storage.GzipStaticFilesStorage'
+
 POSTS_ON_PAGE = 10
 
+ARCHIVE_AFTER_DAYS = 365
+
+# Отложенная запись комментариев и подписок: пачка сбрасывается через
+# WRITE_BEHIND_FLUSH_MS миллисекунд или по WRITE_BEHIND_MAX_ITEMS записей.
+WRITE_BEHIND_ENABLED = bool(os.getenv('WRITE_BEHIND', default=False))
+
+WRITE_BEHIND_FLUSH_MS = 200
+
+WRITE_BEHIND_MAX_ITEMS = 100
+
+# Фоновые задачи выполняет команда run_jobs. С JOBS_EAGER=1 задачи
+# выполняются сразу при постановке, воркер не нужен; при DEBUG так по
+# умолчанию, чтобы письма и прочие задачи работали без run_jobs.
+JOBS_EAGER = bool(os.getenv('JOBS_EAGER', default=DEBUG))
+
+JOBS_RETRY_DELAY = 10
+
+JOBS_STALE_SECONDS = 600
+
+# Уведомления о новых постах раздаются подписчикам пачками по
+# NOTIFY_CHUNK_SIZE; этими же пачками собираются письма дайджеста.
+NOTIFY_CHUNK_SIZE = 1000
+
+# Поток новых постов (SSE): соединение живёт SSE_TIMEOUT секунд, база
+# опрашивается не чаще раза в SSE_POLL_SECONDS на процесс, в памяти
+# держатся последние SSE_BACKLOG событий.
+SSE_TIMEOUT = 30
+
+SSE_POLL_SECONDS = 2
+
+SSE_BACKLOG = 500
+
+# Популярное: вклад события вдвое падает за TRENDING_HALF_LIFE часов,
+# в кэше держится TRENDING_SIZE лучших постов, а compact_trending
+# удаляет посты, чей рейтинг затух ниже TRENDING_MIN_SCORE.
+TRENDING_HALF_LIFE = 6
+
+TRENDING_SIZE = 50
+
+TRENDING_MIN_SCORE = 0.5
+
+TRENDING_WEIGHTS = {'view': 1, 'follow': 2, 'comment': 3}
+
+# Массовая подписка пишет связи пачками такого размера.
+FOLLOW_CHUNK_SIZE = 500
+
+# «Кого читать»: сколько авторов предлагать и сколько держать
+# готовый список в кэше.
+RECOMMENDATIONS_SIZE = 5
+
+RECOMMENDATIONS_SECONDS = 3600
+
+# Просмотры постов копятся в памяти процесса и уходят в базу не чаще
+# раза в VIEWS_FLUSH_SECONDS или по VIEWS_MAX_ITEMS постов. Повторный
+# просмотр из той же сессии в течение VIEWS_DEDUP_SECONDS не считается;
+# 0 отключает эту проверку.
+VIEWS_FLUSH_SECONDS = 10
+
+VIEWS_MAX_ITEMS = 1000
+
+VIEWS_DEDUP_SECONDS = 1800
+
+# Кэш групп по slug и пользователей по username; отсутствие объекта
+# кэшируется на меньший срок.
+OBJECT_CACHE_SECONDS = 600
+
+OBJECT_CACHE_MISSING_SECONDS = 60
+
+# На сколько строк разбит счётчик реакций каждого поста.
+REACTION_COUNTER_SHARDS = 8
+
+# Кэширующий прокси перед приложением. Страницы помечаются заголовком
+# Surrogate-Key, анонимные он может держать SURROGATE_MAX_AGE секунд.
+# При изменении постов, комментариев и групп ключи уходят на PURGE_URL
+# пачками по PURGE_BATCH_SIZE не реже раза в PURGE_FLUSH_MS; без
+# PURGE_URL сброс отключён.
+SURROGATE_MAX_AGE = 300
+
+PURGE_URL = os.getenv('PURGE_URL', default='')
+
+PURGE_TOKEN = os.getenv('PURGE_TOKEN', default='')
+
+PURGE_BATCH_SIZE = 100
+
+PURGE_FLUSH_MS = 500
+
+PURGE_TIMEOUT = 5
+
+# Оболочка страниц постов и лент, общая для всех пользователей: столько
+# секунд она живёт в кэше, если её ключи не сбросили раньше. Свои для
+# каждого пользователя фрагменты отрисовываются на каждом запросе.
+# 0 отключает кэш оболочек.
+SHELL_CACHE_SECONDS = 300
+
+# Адрес сайта для ссылок в письмах.
+SITE_URL = os.getenv('SITE_URL', default='http://127.0.0.1:8000')
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -123,8 +271,44 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Медиафайлы отдаёт core.media.serve_media. MEDIA_ACCEL=x-accel-redirect
+# передаёт файл nginx через internal-location MEDIA_ACCEL_PREFIX,
+# MEDIA_ACCEL=x-sendfile - Apache или lighttpd; без него файл отдаёт
+# само приложение. Файлы вне MEDIA_PUBLIC_PREFIXES видны только
+# сотрудникам.
+MEDIA_ACCEL = os.getenv('MEDIA_ACCEL', default='')
+
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+MEDIA_PUBLIC_PREFIXES = ('posts/', 'cache/')
+
+MEDIA_MAX_AGE = 86400
+
+LOCAL_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+# Без CACHE_BACKEND кэш живёт в памяти процесса. Для нескольких
+# воркеров нужен общий кэш, например
+# CACHE_BACKEND=django.core.cache.backends.memcached.MemcachedCache и
+# CACHE_LOCATION=127.0.0.1:11211: иначе сброс кэша в одном воркере не
+# виден остальным.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': os.getenv('CACHE_BACKEND', default=LOCAL_CACHE_BACKEND),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
     }
 }
+
+SHARED_CACHE = CACHES['default']['BACKEND'] != LOCAL_CACHE_BACKEND
+
+# Сколько держать в кэше отсортированный массив подписок пользователя.
+# Подписка сбрасывает его только в кэше своего воркера, поэтому без
+# общего кэша другие воркеры видят старый граф не дольше полминуты.
+FOLLOW_GRAPH_SECONDS = 3600 if SHARED_CACHE else 30
+
+# cached_db читает сессию из кэша и обращается к базе только при промахе,
+# SESSION_BACKEND=signed_cookies хранит сессию в подписанной куке.
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.getenv(
+    'SESSION_BACKEND', default='cached_db')
+
+# 0 - читать пользователя сессии из базы на каждый запрос.
+USER_CACHE_SECONDS = 60
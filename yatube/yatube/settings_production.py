@@ -0,0 +1,62 @@
+"""Настройки для сервера: без инструментов разработки.
+
+DJANGO_SETTINGS_MODULE=yatube.settings_production
+Для воркеров, которые отдают только ленты, задайте FEED_WORKER=1:
+тогда не подключаются админка и flash-сообщения.
+
+Без общего кэша (CACHE_BACKEND) выход, смена пароля и блокировка
+сбрасывали бы кэш только одного воркера, поэтому сессии тогда
+хранятся в базе, а пользователь не кэшируется.
+"""
+import copy
+import os
+import warnings
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import (INSTALLED_APPS, MIDDLEWARE, SESSION_ENGINE,
+                       SHARED_CACHE, TEMPLATES)
+
+if not os.getenv('SECRET_KEY'):
+    raise ImproperlyConfigured('Задайте SECRET_KEY в окружении.')
+
+DEBUG = False
+
+if not SHARED_CACHE:
+    warnings.warn('Кэш в памяти процесса не общий для воркеров: задайте '
+                  'CACHE_BACKEND. Сессии хранятся в базе, пользователь '
+                  'не кэшируется.')
+    if SESSION_ENGINE == 'django.contrib.sessions.backends.cached_db':
+        SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+    USER_CACHE_SECONDS = 0
+
+DEV_APPS = ['debug_toolbar']
+
+DEV_MIDDLEWARE = ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
+DEV_CONTEXT_PROCESSORS = ['django.template.context_processors.debug']
+
+if os.getenv('FEED_WORKER'):
+    DEV_APPS += ['django.contrib.admin', 'django.contrib.messages']
+    DEV_MIDDLEWARE += [
+        'django.contrib.messages.middleware.MessageMiddleware']
+    DEV_CONTEXT_PROCESSORS += [
+        'django.contrib.messages.context_processors.messages']
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in DEV_APPS]
+
+MIDDLEWARE = [item for item in MIDDLEWARE if item not in DEV_MIDDLEWARE]
+
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['context_processors'] = [
+    processor for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+    if processor not in DEV_CONTEXT_PROCESSORS
+]
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
@@ -1,8 +1,9 @@
+from django.apps import apps
 from django.conf import settings
-from django.conf.urls.static import static
-from django.contrib import admin
 from django.urls import include, path
 
+from core.media import serve_media
+
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.permission_denied'
 handler500 = 'core.views.server_error'
@@ -10,16 +11,19 @@ handler500 = 'core.views.server_error'
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
-    path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path(f'{settings.MEDIA_URL.strip("/")}/<path:path>', serve_media,
+         name='media'),
 ]
 
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.insert(1, path('admin/', admin.site.urls))
+
 if settings.DEBUG:
     import debug_toolbar
 
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )